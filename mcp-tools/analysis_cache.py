@@ -0,0 +1,173 @@
+"""
+Analysis Result Cache for Adaptive Maths Tutor
+Optional memoization layer in front of analyze_student_gaps.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional, Set, Tuple
+import hashlib
+import json
+import time
+
+from session_columns import SessionColumns
+from student_analyzer import analyze_student_gaps
+
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_TTL_SECONDS = 300.0
+
+
+def fingerprint_student_data(student_data: Dict[str, Any]) -> str:
+    """
+    Stable content hash of the analyzer inputs.
+
+    Numbers are compared by value (45 and 45.0 hash the same). Key order of
+    diagnostic_scores / topics_covered and session order are kept: the
+    analyzer's weak-topic and focus-area order follow them.
+    """
+    sessions = student_data.get("recent_sessions", [])
+    if isinstance(sessions, SessionColumns):
+        sessions = sessions.to_dicts()
+
+    normalized = {
+        "diagnostic_scores": _normalize(student_data.get("diagnostic_scores", {})),
+        "recent_sessions": [
+            [
+                _normalize(session.get("questions_correct", 0)),
+                _normalize(session.get("questions_total", 1)),
+                _normalize(session.get("topics_covered", {}))
+            ]
+            for session in sessions
+        ]
+    }
+    encoded = json.dumps(normalized, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _normalize(value: Any) -> Any:
+    """Make numerically equal values encode identically."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+class AnalysisCache:
+    """
+    Bounded LRU cache of analyze_student_gaps results with a TTL.
+
+    Cached results are shared between callers and must be treated as read-only.
+    Inputs carrying a trend_tracker are mutable state and bypass the cache.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # key -> (expires_at, student_id, result)
+        self._entries: "OrderedDict[str, Tuple[float, Optional[str], Dict[str, Any]]]" = OrderedDict()
+        self._keys_by_student: Dict[str, Set[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def analyze(self, student_data: Dict[str, Any], student_id: Optional[str] = None) -> Dict[str, Any]:
+        """analyze_student_gaps, served from the cache when the inputs are unchanged."""
+        if student_data.get("trend_tracker") is not None:
+            self.misses += 1
+            return analyze_student_gaps(student_data)
+
+        # Scope keys by student so invalidate() never drops another student's entry
+        key = f"{student_id or ''}:{fingerprint_student_data(student_data)}"
+        entry = self._entries.get(key)
+        now = self._clock()
+
+        if entry is not None:
+            if entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self._remove(key)
+            self.expirations += 1
+
+        self.misses += 1
+        result = analyze_student_gaps(student_data)
+        expires_at = now + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        self._entries[key] = (expires_at, student_id, result)
+        if student_id is not None:
+            self._keys_by_student.setdefault(student_id, set()).add(key)
+
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+        return result
+
+    def invalidate(self, student_id: str) -> int:
+        """Drop every cached result for a student (e.g. after a new session); returns the count."""
+        keys = self._keys_by_student.pop(student_id, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        return len(keys)
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        self._entries.clear()
+        self._keys_by_student.clear()
+
+    def _remove(self, key: str) -> None:
+        """Remove one entry and its student index link."""
+        _, student_id, _ = self._entries.pop(key)
+        if student_id is not None:
+            keys = self._keys_by_student.get(student_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_student[student_id]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+# Example usage
+if __name__ == "__main__":
+    cache = AnalysisCache(max_entries=100, ttl_seconds=60)
+    sample_data = {
+        "diagnostic_scores": {"multiplication_tables": 45, "division": 38},
+        "recent_sessions": [
+            {"questions_correct": 6, "questions_total": 10, "topics_covered": {"multiplication_tables": 50}}
+        ]
+    }
+
+    for _ in range(3):
+        cache.analyze(sample_data, student_id="student-1")
+    print("After 3 calls:", cache.stats())
+
+    cache.invalidate("student-1")
+    cache.analyze(sample_data, student_id="student-1")
+    print("After invalidation:", cache.stats())
@@ -0,0 +1,219 @@
+"""
+Incremental Question Bank Revalidation for Adaptive Maths Tutor
+Re-checks only the question_bank rows whose content or rules changed since
+the last run, and reports which questions started or stopped passing.
+"""
+
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+import hashlib
+import json
+import os
+import sys
+
+import benchmark_checker
+import curriculum_validator
+from question_document import QuestionDocument
+from result_cache import rules_version
+
+# Bump when the stored state layout changes; older state files are ignored
+STATE_VERSION = 1
+
+
+def question_fingerprint(text: str, answer: Any, topic: str) -> str:
+    """Content hash of the fields the checks read."""
+    encoded = json.dumps([text, answer, topic], sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def question_from_row(row: Dict[str, Any]) -> Tuple[str, Dict[str, Any], str]:
+    """
+    Convert a question_bank row into (id, question, topic).
+
+    correct_answer is JSONB: numbers are used as-is, JSON strings from CSV
+    exports are decoded, and {"value": n} objects are unwrapped.
+    """
+    answer = row.get("correct_answer")
+    if isinstance(answer, str):
+        try:
+            answer = json.loads(answer)
+        except ValueError:
+            pass
+    if isinstance(answer, dict):
+        answer = answer.get("value")
+    question = {"text": row.get("question_text") or "", "answer": answer}
+    return str(row["id"]), question, row.get("topic") or ""
+
+
+class RuleFingerprints:
+    """
+    Fingerprints of the active rule set, split by what each result depends on.
+
+    Validation depends on the shared vocabulary tables plus the standard for
+    its (year, topic), so editing one topic's standard only invalidates that
+    topic's rows. Benchmarking depends on the benchmark tables as a whole.
+    """
+
+    def __init__(self, year: int = curriculum_validator.DEFAULT_YEAR):
+        self.year = year
+        shared = {
+            key: value for key, value in curriculum_validator.RULE_TABLES.items()
+            if key != "year_3_standards"
+        }
+        self._shared_validator = rules_version(shared)
+        self._standards = curriculum_validator.CURRICULA.standards(year)
+        self._by_topic: Dict[str, str] = {}
+        self.benchmark = rules_version(benchmark_checker.RULE_TABLES)
+
+    def validator(self, topic: str) -> str:
+        """Fingerprint of the validation rules that apply to a topic."""
+        fingerprint = self._by_topic.get(topic)
+        if fingerprint is None:
+            fingerprint = self._by_topic[topic] = rules_version({
+                "shared": self._shared_validator,
+                "year": self.year,
+                "standard": self._standards.get(topic)
+            })
+        return fingerprint
+
+
+def revalidate_bank(
+    rows: Iterable[Dict[str, Any]],
+    state: Optional[Dict[str, Any]] = None,
+    year: int = curriculum_validator.DEFAULT_YEAR
+) -> Dict[str, Any]:
+    """
+    Bring a stored revalidation state up to date with a new bank snapshot.
+
+    Args:
+        rows: question_bank rows (id, question_text, correct_answer, topic)
+        state: State returned by the previous run (None for a full run)
+        year: Year group whose curriculum applies
+
+    Returns:
+        Dictionary containing:
+            - state: New state to store for the next run
+            - diff: newly_failing / newly_passing (were checked before with
+              the opposite outcome), added and removed question IDs
+            - stats: Row counts and how many checks were recomputed
+    """
+    if state is None or state.get("state_version") != STATE_VERSION or state.get("year") != year:
+        state = {"questions": {}}
+    previous: Dict[str, Dict[str, Any]] = state["questions"]
+    rules = RuleFingerprints(year)
+
+    questions: Dict[str, Dict[str, Any]] = {}
+    diff: Dict[str, List[Any]] = {"newly_failing": [], "newly_passing": [], "added": [], "removed": []}
+    stats = {"rows": 0, "unchanged": 0, "validated": 0, "benchmarked": 0}
+
+    for row in rows:
+        question_id, question, topic = question_from_row(row)
+        stats["rows"] += 1
+        fingerprint = question_fingerprint(question["text"], question["answer"], topic)
+        validator_rules = rules.validator(topic)
+
+        entry = previous.get(question_id)
+        same_question = entry is not None and entry["fingerprint"] == fingerprint
+        document = None
+        record = {
+            "fingerprint": fingerprint,
+            "topic": topic,
+            "validator_rules": validator_rules,
+            "benchmark_rules": rules.benchmark
+        }
+
+        if same_question and entry["validator_rules"] == validator_rules:
+            record["is_valid"] = entry["is_valid"]
+            record["issues"] = entry["issues"]
+        else:
+            document = QuestionDocument(question["text"])
+            result = curriculum_validator.validate_question(question, topic, document=document, year=year)
+            record["is_valid"] = result["is_valid"]
+            record["issues"] = result["issues"]
+            stats["validated"] += 1
+
+        if same_question and entry["benchmark_rules"] == rules.benchmark:
+            record["quality_score"] = entry["quality_score"]
+            record["improvements"] = entry["improvements"]
+        else:
+            if document is None:
+                document = QuestionDocument(question["text"])
+            result = benchmark_checker.compare_to_benchmark(question, topic, document=document)
+            record["quality_score"] = result["quality_score"]
+            record["improvements"] = result["improvements_needed"]
+            stats["benchmarked"] += 1
+
+        if document is None:
+            stats["unchanged"] += 1
+        record["passes"] = record["is_valid"] and record["quality_score"] >= benchmark_checker.PASSING_THRESHOLD
+        questions[question_id] = record
+
+        if entry is None:
+            diff["added"].append(_diff_entry(question_id, record))
+        elif entry["passes"] and not record["passes"]:
+            diff["newly_failing"].append(_diff_entry(question_id, record))
+        elif not entry["passes"] and record["passes"]:
+            diff["newly_passing"].append(_diff_entry(question_id, record))
+
+    diff["removed"] = sorted(question_id for question_id in previous if question_id not in questions)
+    stats["removed"] = len(diff["removed"])
+    stats["passing"] = sum(record["passes"] for record in questions.values())
+
+    return {
+        "state": {"state_version": STATE_VERSION, "year": year, "questions": questions},
+        "diff": diff,
+        "stats": stats
+    }
+
+
+def _diff_entry(question_id: str, record: Dict[str, Any]) -> Dict[str, Any]:
+    """Summary of one question's current outcome for the diff."""
+    return {
+        "id": question_id,
+        "topic": record["topic"],
+        "passes": record["passes"],
+        "is_valid": record["is_valid"],
+        "quality_score": record["quality_score"],
+        "issues": record["issues"],
+        "improvements": record["improvements"]
+    }
+
+
+def load_state(path: str) -> Optional[Dict[str, Any]]:
+    """Read a stored state file, or None if there is none yet."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state: Dict[str, Any], path: str) -> None:
+    """Write a state file atomically, so an interrupted run keeps the previous one."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+# Example usage
+if __name__ == "__main__":
+    import argparse
+
+    from session_ingest import read_export
+
+    parser = argparse.ArgumentParser(description="Revalidate changed question_bank rows")
+    parser.add_argument("bank", help="question_bank export (.jsonl or .csv, optionally .gz)")
+    parser.add_argument("--state", required=True, help="state file from the previous run (created if missing)")
+    parser.add_argument("--year", type=int, default=curriculum_validator.DEFAULT_YEAR, help="year group (2-6)")
+    parser.add_argument("--output", help="write the diff as JSON here (default: stdout)")
+    args = parser.parse_args()
+
+    report = revalidate_bank(read_export(args.bank), load_state(args.state), args.year)
+    save_state(report["state"], args.state)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            json.dump(report["diff"], out, indent=2)
+    else:
+        json.dump(report["diff"], sys.stdout, indent=2)
+        print()
+    print(f"Stats: {report['stats']}", file=sys.stderr)
@@ -3,8 +3,15 @@ Question Quality Benchmark Checker for Adaptive Maths Tutor
 Compares generated questions against quality standards for Year 3 students.
 """
 
-from typing import Dict, List, Any, Optional
-import re
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Tuple, Union
+import heapq
+import itertools
+
+import numpy as np
+
+from lexicon import Lexicon
+from question_document import QuestionDocument, source_fingerprint
+from result_types import BenchmarkResult
 
 TOOL_METADATA = {
     "name": "compare_to_benchmark",
@@ -88,7 +95,7 @@ CONTEXT_SCENARIOS = [
     "picnic", "fair", "market", "bakery", "sports", "game"
 ]
 
-# Clear language indicators
+# Clear language indicators (literal phrases)
 CLEAR_LANGUAGE_PATTERNS = [
     r"how many",
     r"what is",
@@ -112,8 +119,156 @@ CHILD_NAMES = [
     "leo", "ava", "noah", "isla", "oscar", "poppy", "max", "rosie"
 ]
 
+# Vague quantity words that should be replaced with numbers
+AMBIGUOUS_WORDS = ["some", "few", "several", "many", "lots"]
+
+# Vocabulary too formal for Year 3
+COMPLEX_WORDS = [
+    "calculate", "determine", "evaluate", "compute", "quotient",
+    "dividend", "multiplicand", "subsequently", "therefore", "hence"
+]
+
+# Themes unsuitable for ages 7-8
+INAPPROPRIATE_THEMES = [
+    "death", "violence", "alcohol", "gambling", "war", "weapon",
+    "scary", "horror", "blood", "injury"
+]
+
+# Positive/neutral tone indicators
+POSITIVE_WORDS = [
+    "share", "give", "help", "friend", "together", "fun", "happy",
+    "play", "game", "win", "collect", "find"
+]
+
+# Topic-specific words suggested alongside concrete objects
+TOPIC_OBJECT_WORDS = {
+    "multiplication": ["groups", "rows", "arrays", "packs", "bags"],
+    "division": ["shared", "equal", "groups", "each", "everyone"],
+    "addition": ["altogether", "total", "more", "combined"],
+    "subtraction": ["left", "remaining", "gave away", "fewer"]
+}
+
+# All keyword lists compiled once; stem-style lists also match inflected forms
+BENCHMARK_LEXICON = Lexicon(
+    {
+        "scenario": CONTEXT_SCENARIOS,
+        "character": CHILD_NAMES,
+        "action": AGE_APPROPRIATE_VERBS,
+        "clear_question": CLEAR_LANGUAGE_PATTERNS,
+        "ambiguous": AMBIGUOUS_WORDS,
+        "complex": COMPLEX_WORDS,
+        "inappropriate": INAPPROPRIATE_THEMES,
+        "positive": POSITIVE_WORDS,
+        "object": CONCRETE_OBJECTS,
+        **{f"topic_{topic}": words for topic, words in TOPIC_OBJECT_WORDS.items()}
+    },
+    inflect=["scenario", "complex", "inappropriate", "positive"]
+)
+
+# Tables the checks read, plus a hash of the check code; cached results are
+# keyed on a hash of these.
+RULE_TABLES = {
+    "checks_source": source_fingerprint(__file__),
+    "criteria_weights": CRITERIA_WEIGHTS,
+    "passing_threshold": PASSING_THRESHOLD,
+    "concrete_objects": CONCRETE_OBJECTS,
+    "context_scenarios": CONTEXT_SCENARIOS,
+    "clear_language_patterns": CLEAR_LANGUAGE_PATTERNS,
+    "age_appropriate_verbs": AGE_APPROPRIATE_VERBS,
+    "child_names": CHILD_NAMES,
+    "ambiguous_words": AMBIGUOUS_WORDS,
+    "complex_words": COMPLEX_WORDS,
+    "inappropriate_themes": INAPPROPRIATE_THEMES,
+    "positive_words": POSITIVE_WORDS,
+    "topic_object_words": TOPIC_OBJECT_WORDS
+}
+
+# Binary features behind the criterion scores: (name, criterion, points when present)
+BENCHMARK_FEATURES = [
+    ("has_scenario", "real_world_context", 0.4),
+    ("has_character", "real_world_context", 0.3),
+    ("has_action", "real_world_context", 0.3),
+    ("has_clear_question", "clear_language", 0.3),
+    ("has_question_mark", "clear_language", 0.2),
+    ("is_short", "clear_language", 0.25),
+    ("no_ambiguous_words", "clear_language", 0.25),
+    ("no_complex_words", "age_appropriate", 0.4),
+    ("no_inappropriate_themes", "age_appropriate", 0.3),
+    ("has_positive_tone", "age_appropriate", 0.3),
+    ("has_object", "concrete_objects", 0.5),
+    ("has_multiple_objects", "concrete_objects", 0.2),
+    ("has_numbers", "concrete_objects", 0.3)
+]
+
+# Feature x criterion points matrix and criterion weight vector, in CRITERIA_WEIGHTS order
+_CRITERIA = list(CRITERIA_WEIGHTS)
+_FEATURE_POINTS = np.zeros((len(BENCHMARK_FEATURES), len(_CRITERIA)))
+for _row, (_, _criterion, _points) in enumerate(BENCHMARK_FEATURES):
+    _FEATURE_POINTS[_row, _CRITERIA.index(_criterion)] = _points
+_WEIGHT_VECTOR = np.array([CRITERIA_WEIGHTS[criterion] for criterion in _CRITERIA]) / sum(CRITERIA_WEIGHTS.values()) * 10
+
+# Most each feature can add to the 0-10 quality score
+_FEATURE_MAX_SCORE = [
+    points * CRITERIA_WEIGHTS[criterion] / sum(CRITERIA_WEIGHTS.values()) * 10
+    for _, criterion, points in BENCHMARK_FEATURES
+]
+
+
+# Feature name -> column in BENCHMARK_FEATURES
+_FEATURE_INDEX = {name: i for i, (name, _, _) in enumerate(BENCHMARK_FEATURES)}
 
-def compare_to_benchmark(generated_question: Dict[str, Any], topic: str) -> Dict[str, Any]:
+
+def _ranking_stage(features: Dict[str, Callable[[QuestionDocument], bool]]) -> Tuple:
+    """A ranking stage computing the named features from the document."""
+    indices = tuple(_FEATURE_INDEX[name] for name in features)
+    return indices, lambda document: [test(document) for test in features.values()]
+
+
+def _lexicon_stage(categories: Iterable[str], features: Dict[str, Callable[[Dict[str, List[str]]], bool]]) -> Tuple:
+    """A ranking stage computing the named features from a scan of some BENCHMARK_LEXICON categories."""
+    lexicon = BENCHMARK_LEXICON.subset(categories)
+    indices = tuple(_FEATURE_INDEX[name] for name in features)
+    return indices, lambda document: [test(document.hits(lexicon)) for test in features.values()]
+
+
+# Staged feature extraction for rank_candidates, cheapest first:
+# (feature indices, document -> feature values)
+RANKING_STAGES = [
+    _ranking_stage({
+        "has_question_mark": lambda document: "?" in document.text,
+        "is_short": lambda document: len(document.words) <= 25,
+        "has_numbers": lambda document: bool(document.numbers)
+    }),
+    _lexicon_stage(("clear_question", "ambiguous"), {
+        "has_clear_question": lambda hits: "clear_question" in hits,
+        "no_ambiguous_words": lambda hits: "ambiguous" not in hits
+    }),
+    _lexicon_stage(("complex", "inappropriate", "positive"), {
+        "no_complex_words": lambda hits: "complex" not in hits,
+        "no_inappropriate_themes": lambda hits: "inappropriate" not in hits,
+        "has_positive_tone": lambda hits: "positive" in hits
+    }),
+    _lexicon_stage(("scenario", "character", "action"), {
+        "has_scenario": lambda hits: "scenario" in hits,
+        "has_character": lambda hits: "character" in hits,
+        "has_action": lambda hits: "action" in hits
+    }),
+    _lexicon_stage(("object",), {
+        "has_object": lambda hits: len(hits.get("object", ())) >= 1,
+        "has_multiple_objects": lambda hits: len(hits.get("object", ())) >= 2
+    })
+]
+
+# Slack for float error when comparing score bounds
+_BOUND_EPSILON = 1e-9
+
+
+def compare_to_benchmark(
+    generated_question: Dict[str, Any],
+    topic: str,
+    document: Optional[QuestionDocument] = None,
+    compact: bool = False
+) -> Union[Dict[str, Any], BenchmarkResult]:
     """
     Compare a generated question against quality benchmarks.
     
@@ -124,6 +279,9 @@ def compare_to_benchmark(generated_question: Dict[str, Any], topic: str) -> Dict
             - topic: The maths topic (optional)
             - difficulty: Difficulty level (optional)
         topic: The curriculum topic for context
+        document: Parsed question text to reuse (optional, e.g. shared
+            with validate_question)
+        compact: Return a BenchmarkResult (to_dict() gives the usual dict)
     
     Returns:
         Dictionary containing:
@@ -131,29 +289,30 @@ def compare_to_benchmark(generated_question: Dict[str, Any], topic: str) -> Dict
             - passes_benchmark: True if score >= 7
             - improvements_needed: List of improvement suggestions
     """
-    text = generated_question.get("text", "")
+    if document is None:
+        document = QuestionDocument.from_question(generated_question)
     
     # Evaluate each criterion
     scores = {}
     improvements = []
     
     # Check real-world context
-    context_score, context_improvements = _check_real_world_context(text, topic)
+    context_score, context_improvements = _check_real_world_context(document, topic)
     scores["real_world_context"] = context_score
     improvements.extend(context_improvements)
     
     # Check clear language
-    language_score, language_improvements = _check_clear_language(text)
+    language_score, language_improvements = _check_clear_language(document)
     scores["clear_language"] = language_score
     improvements.extend(language_improvements)
     
     # Check age appropriateness
-    age_score, age_improvements = _check_age_appropriate(text)
+    age_score, age_improvements = _check_age_appropriate(document)
     scores["age_appropriate"] = age_score
     improvements.extend(age_improvements)
     
     # Check concrete objects
-    objects_score, objects_improvements = _check_concrete_objects(text, topic)
+    objects_score, objects_improvements = _check_concrete_objects(document, topic)
     scores["concrete_objects"] = objects_score
     improvements.extend(objects_improvements)
     
@@ -166,6 +325,11 @@ def compare_to_benchmark(generated_question: Dict[str, Any], topic: str) -> Dict
     # Round to 1 decimal place
     total_score = round(total_score, 1)
     
+    if compact:
+        return BenchmarkResult(
+            total_score, total_score >= PASSING_THRESHOLD, improvements,
+            context_score, language_score, age_score, objects_score
+        )
     return {
         "quality_score": total_score,
         "passes_benchmark": total_score >= PASSING_THRESHOLD,
@@ -174,19 +338,208 @@ def compare_to_benchmark(generated_question: Dict[str, Any], topic: str) -> Dict
     }
 
 
-def _check_real_world_context(text: str, topic: str) -> tuple[float, List[str]]:
+def benchmark_feature_row(document: QuestionDocument) -> List[bool]:
+    """Values of BENCHMARK_FEATURES for one question, in table order."""
+    hits = document.hits(BENCHMARK_LEXICON)
+    object_count = len(hits.get("object", ()))
+    return [
+        "scenario" in hits,
+        "character" in hits,
+        "action" in hits,
+        "clear_question" in hits,
+        "?" in document.text,
+        len(document.words) <= 25,
+        "ambiguous" not in hits,
+        "complex" not in hits,
+        "inappropriate" not in hits,
+        "positive" in hits,
+        object_count >= 1,
+        object_count >= 2,
+        bool(document.numbers)
+    ]
+
+
+def benchmark_feature_matrix(documents: Iterable[QuestionDocument]) -> np.ndarray:
+    """Binary (questions x BENCHMARK_FEATURES) matrix, one row per document."""
+    rows = [benchmark_feature_row(document) for document in documents]
+    return np.array(rows, dtype=np.float64).reshape(len(rows), len(BENCHMARK_FEATURES))
+
+
+def score_feature_matrix(features: np.ndarray) -> Dict[str, Any]:
+    """
+    Criterion and quality scores for a feature matrix, as matrix products.
+
+    Returns:
+        Dictionary containing:
+            - criteria: Criterion names, the column order of criterion_scores
+            - criterion_scores: (questions x criteria) scores, 0-1 each
+            - quality_score: Weighted score 0-10, rounded to 1 decimal place
+            - passes_benchmark: quality_score >= PASSING_THRESHOLD
+    """
+    criterion_scores = features @ _FEATURE_POINTS
+    quality_score = np.round(criterion_scores @ _WEIGHT_VECTOR, 1)
+    return {
+        "criteria": list(_CRITERIA),
+        "criterion_scores": criterion_scores,
+        "quality_score": quality_score,
+        "passes_benchmark": quality_score >= PASSING_THRESHOLD
+    }
+
+
+def compare_to_benchmark_batch(
+    questions: Iterable[Dict[str, Any]],
+    documents: Optional[Iterable[QuestionDocument]] = None
+) -> Dict[str, Any]:
+    """
+    Score many questions at once, e.g. a pool of generated candidates.
+    
+    Features are extracted once per question; the scoring itself is two
+    matrix products over the whole pool. Scores match compare_to_benchmark
+    (which no topic affects); call it for improvements_needed on the
+    questions you keep.
+    
+    Args:
+        questions: Question dicts with a text key
+        documents: Parsed texts to reuse, one per question in the same
+            order (optional); a ValueError is raised if they do not line up
+    
+    Returns:
+        score_feature_matrix's dictionary plus the features matrix
+    """
+    if documents is None:
+        documents = (QuestionDocument.from_question(question) for question in questions)
+    else:
+        documents = _paired_documents(questions, documents)
+    features = benchmark_feature_matrix(documents)
+    return {"features": features, **score_feature_matrix(features)}
+
+
+def _paired_documents(
+    questions: Iterable[Dict[str, Any]],
+    documents: Iterable[QuestionDocument]
+) -> Iterator[QuestionDocument]:
+    """Documents checked one for one against the questions they were parsed from."""
+    missing = object()
+    for i, (question, document) in enumerate(itertools.zip_longest(questions, documents, fillvalue=missing)):
+        if question is missing or document is missing:
+            raise ValueError("questions and documents must have the same length")
+        if document.text != question.get("text", ""):
+            raise ValueError(f"Document {i} was not parsed from question {i}'s text")
+        yield document
+
+
+def rank_candidates(
+    candidates: Iterable[Dict[str, Any]],
+    topic: str,
+    k: int = 5,
+    require_passing: bool = True,
+    stop_when_passing: bool = True
+) -> Dict[str, Any]:
+    """
+    Pick the k best generated candidates for a topic without fully scoring them all.
+    
+    Each candidate's features are extracted in RANKING_STAGES order. After
+    each stage, the candidate is dropped if even a perfect result in the
+    remaining stages could not beat the current k-th best score, or could
+    not reach PASSING_THRESHOLD when require_passing is set. Once k
+    candidates pass, the remaining candidates are skipped if
+    stop_when_passing is set. Candidates are always skipped once k of them
+    score the maximum of 10. Ties keep the earlier candidate.
+    
+    Args:
+        candidates: Generated question dicts, in generation order
+        topic: The curriculum topic for context
+        k: Number of candidates to return
+        require_passing: Only return candidates that pass the benchmark
+        stop_when_passing: Stop at the first k passing candidates instead
+            of searching the whole pool for better ones
+    
+    Returns:
+        Dictionary containing:
+            - top: Up to k compare_to_benchmark results, best first, each
+              with the candidate's index and question added
+            - stats: Candidates seen, fully scored and pruned, feature
+              stages run, and whether the search stopped early
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    
+    # Min-heap of (score, -index, document, question): heap[0] is the current k-th best
+    heap: List[Tuple[float, int, QuestionDocument, Dict[str, Any]]] = []
+    stats = {"candidates": 0, "fully_scored": 0, "pruned": 0, "stages_run": 0, "stopped_early": False}
+    passing = 0
+    feature_count = len(BENCHMARK_FEATURES)
+    
+    for index, question in enumerate(candidates):
+        if heap and len(heap) == k and (
+            heap[0][0] >= 10.0 or (stop_when_passing and passing == k)
+        ):
+            stats["stopped_early"] = True
+            break
+        stats["candidates"] += 1
+        document = QuestionDocument.from_question(question)
+        row: List[bool] = [False] * feature_count
+        known = 0.0
+        remaining = sum(_FEATURE_MAX_SCORE)
+        pruned = False
+        
+        for features, extract in RANKING_STAGES:
+            stats["stages_run"] += 1
+            for feature, value in zip(features, extract(document)):
+                row[feature] = value
+                known += _FEATURE_MAX_SCORE[feature] if value else 0.0
+                remaining -= _FEATURE_MAX_SCORE[feature]
+            bound = round(known + remaining + _BOUND_EPSILON, 1)
+            if (require_passing and bound < PASSING_THRESHOLD) or (len(heap) == k and bound <= heap[0][0]):
+                pruned = True
+                break
+        if pruned:
+            stats["pruned"] += 1
+            continue
+        
+        stats["fully_scored"] += 1
+        score = _score_feature_row(row)
+        entry = (score, -index, document, question)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+            passing += score >= PASSING_THRESHOLD
+        elif (score, -index) > heap[0][:2]:
+            dropped = heapq.heapreplace(heap, entry)
+            passing += (score >= PASSING_THRESHOLD) - (dropped[0] >= PASSING_THRESHOLD)
+    
+    top = []
+    for score, negative_index, document, question in sorted(heap, key=lambda entry: entry[:2], reverse=True):
+        result = compare_to_benchmark(question, topic, document=document)
+        top.append({"index": -negative_index, "question": question, **result})
+    return {"top": top, "stats": stats}
+
+
+def _score_feature_row(row: List[bool]) -> float:
+    """compare_to_benchmark's quality_score from one feature row, with the same float arithmetic."""
+    scores = dict.fromkeys(CRITERIA_WEIGHTS, 0.0)
+    for value, (_, criterion, points) in zip(row, BENCHMARK_FEATURES):
+        if value:
+            scores[criterion] += points
+    total_score = sum(
+        scores[criterion] * weight
+        for criterion, weight in CRITERIA_WEIGHTS.items()
+    ) / sum(CRITERIA_WEIGHTS.values()) * 10
+    return round(total_score, 1)
+
+
+def _check_real_world_context(document: QuestionDocument, topic: str) -> tuple[float, List[str]]:
     """Check if question has real-world context."""
-    text_lower = text.lower()
+    hits = document.hits(BENCHMARK_LEXICON)
     improvements = []
     
     # Check for context scenarios
-    has_scenario = any(scenario in text_lower for scenario in CONTEXT_SCENARIOS)
+    has_scenario = "scenario" in hits
     
     # Check for character names
-    has_character = any(name in text_lower for name in CHILD_NAMES)
+    has_character = "character" in hits
     
     # Check for action verbs
-    has_action = any(verb in text_lower for verb in AGE_APPROPRIATE_VERBS)
+    has_action = "action" in hits
     
     score = 0.0
     
@@ -208,17 +561,14 @@ def _check_real_world_context(text: str, topic: str) -> tuple[float, List[str]]:
     return score, improvements
 
 
-def _check_clear_language(text: str) -> tuple[float, List[str]]:
+def _check_clear_language(document: QuestionDocument) -> tuple[float, List[str]]:
     """Check if language is clear and unambiguous."""
-    text_lower = text.lower()
+    hits = document.hits(BENCHMARK_LEXICON)
     improvements = []
     score = 0.0
     
     # Check for clear question patterns
-    has_clear_question = any(
-        re.search(pattern, text_lower) 
-        for pattern in CLEAR_LANGUAGE_PATTERNS
-    )
+    has_clear_question = "clear_question" in hits
     
     if has_clear_question:
         score += 0.3
@@ -226,21 +576,20 @@ def _check_clear_language(text: str) -> tuple[float, List[str]]:
         improvements.append("Start with a clear question phrase (e.g., 'How many...?')")
     
     # Check for question mark
-    if "?" in text:
+    if "?" in document.text:
         score += 0.2
     else:
         improvements.append("End with a question mark")
     
     # Check sentence length (not too long)
-    words = text.split()
+    words = document.words
     if len(words) <= 25:
         score += 0.25
     else:
         improvements.append(f"Shorten the question (currently {len(words)} words, aim for under 25)")
     
     # Check for ambiguous words
-    ambiguous_words = ["some", "few", "several", "many", "lots"]
-    has_ambiguous = any(word in text_lower for word in ambiguous_words)
+    has_ambiguous = "ambiguous" in hits
     
     if not has_ambiguous:
         score += 0.25
@@ -250,33 +599,22 @@ def _check_clear_language(text: str) -> tuple[float, List[str]]:
     return score, improvements
 
 
-def _check_age_appropriate(text: str) -> tuple[float, List[str]]:
+def _check_age_appropriate(document: QuestionDocument) -> tuple[float, List[str]]:
     """Check if content is age-appropriate for Year 3."""
-    text_lower = text.lower()
+    hits = document.hits(BENCHMARK_LEXICON)
     improvements = []
     score = 0.0
     
     # Check for child-friendly vocabulary
-    complex_words = [
-        "calculate", "determine", "evaluate", "compute", "quotient",
-        "dividend", "multiplicand", "subsequently", "therefore", "hence"
-    ]
-    
-    has_complex = any(word in text_lower for word in complex_words)
+    found = hits.get("complex", [])
     
-    if not has_complex:
+    if not found:
         score += 0.4
     else:
-        found = [w for w in complex_words if w in text_lower]
         improvements.append(f"Simplify complex words: {found}")
     
     # Check for appropriate themes
-    inappropriate_themes = [
-        "death", "violence", "alcohol", "gambling", "war", "weapon",
-        "scary", "horror", "blood", "injury"
-    ]
-    
-    has_inappropriate = any(theme in text_lower for theme in inappropriate_themes)
+    has_inappropriate = "inappropriate" in hits
     
     if not has_inappropriate:
         score += 0.3
@@ -284,12 +622,7 @@ def _check_age_appropriate(text: str) -> tuple[float, List[str]]:
         improvements.append("Remove any inappropriate themes")
     
     # Check for positive/neutral tone
-    positive_words = [
-        "share", "give", "help", "friend", "together", "fun", "happy",
-        "play", "game", "win", "collect", "find"
-    ]
-    
-    has_positive = any(word in text_lower for word in positive_words)
+    has_positive = "positive" in hits
     
     if has_positive:
         score += 0.3
@@ -299,14 +632,14 @@ def _check_age_appropriate(text: str) -> tuple[float, List[str]]:
     return score, improvements
 
 
-def _check_concrete_objects(text: str, topic: str) -> tuple[float, List[str]]:
+def _check_concrete_objects(document: QuestionDocument, topic: str) -> tuple[float, List[str]]:
     """Check if question uses concrete, tangible objects."""
-    text_lower = text.lower()
+    hits = document.hits(BENCHMARK_LEXICON)
     improvements = []
     score = 0.0
     
     # Check for concrete objects
-    found_objects = [obj for obj in CONCRETE_OBJECTS if obj in text_lower]
+    found_objects = hits.get("object", [])
     
     if len(found_objects) >= 1:
         score += 0.5
@@ -316,25 +649,16 @@ def _check_concrete_objects(text: str, topic: str) -> tuple[float, List[str]]:
         improvements.append("Use concrete objects children can visualize (e.g., apples, toys, stickers)")
     
     # Check for numbers (should have specific quantities)
-    numbers = re.findall(r'\b\d+\b', text)
-    
-    if numbers:
+    if document.numbers:
         score += 0.3
     else:
         improvements.append("Include specific numbers rather than vague quantities")
     
     # Topic-specific object suggestions
-    topic_objects = {
-        "multiplication": ["groups", "rows", "arrays", "packs", "bags"],
-        "division": ["shared", "equal", "groups", "each", "everyone"],
-        "addition": ["altogether", "total", "more", "combined"],
-        "subtraction": ["left", "remaining", "gave away", "fewer"]
-    }
-    
-    if topic in topic_objects:
-        has_topic_words = any(word in text_lower for word in topic_objects[topic])
+    if topic in TOPIC_OBJECT_WORDS:
+        has_topic_words = f"topic_{topic}" in hits
         if not has_topic_words:
-            improvements.append(f"For {topic}, consider using: {topic_objects[topic][:3]}")
+            improvements.append(f"For {topic}, consider using: {TOPIC_OBJECT_WORDS[topic][:3]}")
     
     return score, improvements
 
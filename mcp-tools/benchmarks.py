@@ -0,0 +1,281 @@
+"""
+Benchmark Suite for Adaptive Maths Tutor
+Seeded synthetic workloads for the three tools, with stored baselines.
+"""
+
+from typing import Dict, List, Any, Callable, Iterable, Optional, Tuple
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from benchmark_checker import (
+    AGE_APPROPRIATE_VERBS, AMBIGUOUS_WORDS, CHILD_NAMES, COMPLEX_WORDS, CONCRETE_OBJECTS,
+    CONTEXT_SCENARIOS, compare_to_benchmark
+)
+from curriculum_validator import YEAR_3_STANDARDS, validate_question
+from student_analyzer import TOPIC_PREREQUISITES, analyze_student_gaps
+
+DEFAULT_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Relative slowdown (or memory growth) over baseline that counts as a regression
+DEFAULT_TOLERANCE = 0.20
+
+# Every topic the analyzer knows about, prerequisites included
+STUDENT_TOPICS = sorted(set(TOPIC_PREREQUISITES) | {
+    prerequisite for prerequisites in TOPIC_PREREQUISITES.values() for prerequisite in prerequisites
+})
+
+FILLER_WORDS = ["the", "and", "then", "with", "each", "one", "of", "them", "they", "now", "after", "that"]
+
+
+def synthetic_students(
+    n: int,
+    seed: int = 0,
+    topic_count: Tuple[int, int] = (3, 8),
+    session_count: Tuple[int, int] = (0, 20)
+) -> List[Dict[str, Any]]:
+    """
+    Random analyze_student_gaps inputs.
+
+    Each student gets a diagnostic score for a random number of topics in
+    topic_count and a session history whose length is drawn from
+    session_count; each session covers 1-3 of the student's topics.
+    """
+    rng = random.Random(seed)
+    students = []
+    for _ in range(n):
+        topics = rng.sample(STUDENT_TOPICS, rng.randint(*topic_count))
+        sessions = []
+        for _ in range(rng.randint(*session_count)):
+            total = rng.randint(5, 20)
+            sessions.append({
+                "questions_correct": rng.randint(0, total),
+                "questions_total": total,
+                "topics_covered": {
+                    topic: rng.randint(0, 100) for topic in rng.sample(topics, min(len(topics), rng.randint(1, 3)))
+                }
+            })
+        students.append({
+            "diagnostic_scores": {topic: rng.randint(0, 100) for topic in topics},
+            "recent_sessions": sessions
+        })
+    return students
+
+
+def synthetic_questions(
+    n: int,
+    seed: int = 0,
+    sentence_count: Tuple[int, int] = (1, 3),
+    vocabulary_hit_rate: float = 0.5
+) -> List[Tuple[Dict[str, Any], str]]:
+    """
+    Random (question, topic) pairs.
+
+    Sentences are built from filler words, and each slot is filled from the
+    checkers' keyword lists (names, objects, scenarios, verbs, ambiguous
+    and complex words) with probability vocabulary_hit_rate, so the rate
+    controls how many lexicon hits a question produces.
+    """
+    rng = random.Random(seed)
+    topics = list(YEAR_3_STANDARDS)
+    keyword_lists = [CHILD_NAMES, CONCRETE_OBJECTS, CONTEXT_SCENARIOS, AGE_APPROPRIATE_VERBS,
+                     AMBIGUOUS_WORDS, COMPLEX_WORDS]
+    questions = []
+    for _ in range(n):
+        sentences = []
+        for _ in range(rng.randint(*sentence_count)):
+            words = []
+            for _ in range(rng.randint(4, 14)):
+                if rng.random() < vocabulary_hit_rate:
+                    words.append(rng.choice(rng.choice(keyword_lists)))
+                elif rng.random() < 0.3:
+                    words.append(str(rng.randint(1, 150)))
+                else:
+                    words.append(rng.choice(FILLER_WORDS))
+            sentences.append(" ".join(words).capitalize())
+        text = ". ".join(sentences) + rng.choice(["?", "."])
+        questions.append(({"text": text, "answer": rng.randint(1, 200)}, rng.choice(topics)))
+    return questions
+
+
+# name -> (tool, unpack arguments, input generator(n, seed))
+WORKLOADS: Dict[str, Tuple[Callable[..., Any], bool, Callable[[int, int], List[Any]]]] = {
+    "analyze_student_gaps/short_history": (
+        analyze_student_gaps, False, lambda n, seed: synthetic_students(n, seed, (3, 6), (0, 5))
+    ),
+    "analyze_student_gaps/long_history": (
+        analyze_student_gaps, False, lambda n, seed: synthetic_students(n, seed, (6, 12), (30, 60))
+    ),
+    "validate_question/short": (
+        validate_question, True, lambda n, seed: synthetic_questions(n, seed, (1, 1), 0.2)
+    ),
+    "validate_question/long_rich": (
+        validate_question, True, lambda n, seed: synthetic_questions(n, seed, (3, 5), 0.6)
+    ),
+    "compare_to_benchmark/short": (
+        compare_to_benchmark, True, lambda n, seed: synthetic_questions(n, seed, (1, 1), 0.2)
+    ),
+    "compare_to_benchmark/long_rich": (
+        compare_to_benchmark, True, lambda n, seed: synthetic_questions(n, seed, (3, 5), 0.6)
+    )
+}
+
+
+def measure(func: Callable[..., Any], inputs: List[Any], unpack: bool = False, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Time func over every input.
+
+    The timed passes run with the garbage collector paused and tracemalloc
+    off; the best pass (lowest median) is reported. Peak memory comes from
+    a separate traced pass, as tracemalloc slows every allocation.
+    """
+    calls = [(lambda item=item: func(*item)) if unpack else (lambda item=item: func(item)) for item in inputs]
+    for call in calls[:min(len(calls), 50)]:
+        call()  # Warm caches and lazily built tables
+
+    best: Optional[List[float]] = None
+    best_total = 0.0
+    for _ in range(repeat):
+        latencies = []
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            for call in calls:
+                start = time.perf_counter()
+                call()
+                latencies.append(time.perf_counter() - start)
+            total = time.perf_counter() - started
+        finally:
+            gc.enable()
+        latencies.sort()
+        if best is None or latencies[len(latencies) // 2] < best[len(best) // 2]:
+            best, best_total = latencies, total
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for call in calls:
+            call()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    def percentile(p: float) -> float:
+        return round(best[min(len(best) - 1, int(p * len(best)))] * 1e6, 2)
+
+    return {
+        "calls": len(calls),
+        "p50_us": percentile(0.50),
+        "p90_us": percentile(0.90),
+        "p99_us": percentile(0.99),
+        "max_us": round(best[-1] * 1e6, 2),
+        "calls_per_second": round(len(calls) / best_total, 1) if best_total > 0 else 0.0,
+        "peak_memory_kb": round(peak / 1024, 1)
+    }
+
+
+def run_suite(
+    n: int = 2000,
+    seed: int = 42,
+    repeat: int = 3,
+    only: Optional[Iterable[str]] = None
+) -> Dict[str, Any]:
+    """Run every workload (or those whose name starts with one of only) on n seeded inputs."""
+    prefixes = list(only or [])
+    results = {}
+    for name, (func, unpack, make_inputs) in WORKLOADS.items():
+        if prefixes and not any(name.startswith(prefix) for prefix in prefixes):
+            continue
+        results[name] = measure(func, make_inputs(n, seed), unpack, repeat)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "n": n,
+            "seed": seed
+        },
+        "results": results
+    }
+
+
+def compare_to_baseline(
+    report: Dict[str, Any],
+    baseline: Dict[str, Any],
+    tolerance: float = DEFAULT_TOLERANCE
+) -> List[Dict[str, Any]]:
+    """
+    Regressions against a stored baseline: p50 or p99 latency or peak memory
+    more than tolerance above it, or throughput more than tolerance below it.
+    """
+    regressions = []
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        for metric in ("p50_us", "p99_us", "peak_memory_kb"):
+            if previous[metric] and current[metric] > previous[metric] * (1 + tolerance):
+                regressions.append({"workload": name, "metric": metric,
+                                    "baseline": previous[metric], "current": current[metric]})
+        if current["calls_per_second"] < previous["calls_per_second"] * (1 - tolerance):
+            regressions.append({"workload": name, "metric": "calls_per_second",
+                                "baseline": previous["calls_per_second"], "current": current["calls_per_second"]})
+    return regressions
+
+
+def load_baseline(path: str = DEFAULT_BASELINE_PATH) -> Optional[Dict[str, Any]]:
+    """Read a stored baseline, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(report: Dict[str, Any], path: str = DEFAULT_BASELINE_PATH) -> None:
+    """Store a report as the baseline for later runs."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+# Example usage
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the Python tools on seeded synthetic inputs")
+    parser.add_argument("-n", type=int, default=2000, help="inputs per workload")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per workload (best is kept)")
+    parser.add_argument("--only", nargs="*", help="workload name prefixes to run")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="baseline JSON path")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    report = run_suite(args.n, args.seed, args.repeat, args.only)
+    print(f"{'workload':40} {'p50 us':>10} {'p99 us':>10} {'calls/s':>12} {'peak KB':>10}")
+    for name, result in report["results"].items():
+        print(f"{name:40} {result['p50_us']:>10} {result['p99_us']:>10} "
+              f"{result['calls_per_second']:>12} {result['peak_memory_kb']:>10}")
+
+    if args.save_baseline:
+        save_baseline(report, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+    else:
+        baseline = load_baseline(args.baseline)
+        if baseline is None:
+            print("No baseline yet; run with --save-baseline to store one")
+        elif baseline["environment"].get("n") != args.n or baseline["environment"].get("seed") != args.seed:
+            print("Baseline was recorded with a different -n/--seed; not comparing")
+        else:
+            regressions = compare_to_baseline(report, baseline, args.tolerance)
+            for regression in regressions:
+                print(f"REGRESSION {regression['workload']} {regression['metric']}: "
+                      f"{regression['baseline']} -> {regression['current']}")
+            if regressions:
+                sys.exit(1)
+            print("No regressions against baseline")
@@ -0,0 +1,256 @@
+"""
+Curriculum Rule Engine for Adaptive Maths Tutor
+Compiles year-group standards into declarative rules dispatched by (year, topic).
+"""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Any, Callable, Iterable, Optional, Tuple
+import glob
+import hashlib
+import json
+import os
+
+# Largest multiplier learned for each times table
+MAX_MULTIPLIER = 12
+
+# Year-group curricula shipped as data files (year_<n>.json)
+CURRICULA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "curricula")
+
+
+def compile_standards(standards: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Compile curriculum standards into constant-time lookup tables.
+
+    Lists become frozensets (valid_products, valid_divisors,
+    valid_denominators) and numeric limits are copied as-is, so each
+    number check is a single set probe or comparison.
+    """
+    tables = {}
+    for topic, standard in standards.items():
+        table = {
+            key: value for key, value in standard.items()
+            if key.startswith("max_") or key == "steps"
+        }
+        if "tables" in standard:
+            table["valid_products"] = frozenset(
+                n * m for n in standard["tables"] for m in range(1, MAX_MULTIPLIER + 1)
+            )
+        if "divisors" in standard:
+            table["valid_divisors"] = frozenset(standard["divisors"])
+        if "denominators" in standard:
+            table["valid_denominators"] = frozenset(standard["denominators"])
+        tables[topic] = table
+    return tables
+
+
+class Rule(ABC):
+    """One check of a question's numbers or answer against a year group's limit."""
+
+    __slots__ = ("year",)
+
+    # Whether check() looks at the numbers in the question
+    reads_numbers = False
+
+    def __init__(self, year: int):
+        self.year = year
+
+    @abstractmethod
+    def check(self, numbers: List[int], answer: Any, issues: List[str], suggestions: List[str]) -> None:
+        """Append any issues and suggestions for this question."""
+
+
+class TimesTableRule(Rule):
+    """Numbers above 10 must be times-table products."""
+
+    __slots__ = ("valid_products",)
+    reads_numbers = True
+
+    def __init__(self, year: int, valid_products: frozenset):
+        super().__init__(year)
+        self.valid_products = valid_products
+
+    def check(self, numbers, answer, issues, suggestions):
+        for num in numbers:
+            if num > 10 and num not in self.valid_products:
+                issues.append(f"Number {num} may be outside Year {self.year} multiplication range")
+
+
+class AnswerLimitRule(Rule):
+    """The answer must not exceed a maximum."""
+
+    __slots__ = ("limit", "label", "suggestion")
+
+    def __init__(self, year: int, limit: float, label: str, suggestion: Optional[str] = None):
+        super().__init__(year)
+        self.limit = limit
+        self.label = label
+        self.suggestion = suggestion
+
+    def check(self, numbers, answer, issues, suggestions):
+        if answer and answer > self.limit:
+            issues.append(f"{self.label} {answer} exceeds Year {self.year} maximum of {self.limit}")
+            if self.suggestion:
+                suggestions.append(self.suggestion)
+
+
+class LargestNumberRule(Rule):
+    """The largest number in the question must not exceed a maximum."""
+
+    __slots__ = ("limit", "label")
+    reads_numbers = True
+
+    def __init__(self, year: int, limit: float, label: str):
+        super().__init__(year)
+        self.limit = limit
+        self.label = label
+
+    def check(self, numbers, answer, issues, suggestions):
+        if numbers:
+            largest = max(numbers)
+            if largest > self.limit:
+                issues.append(f"{self.label} {largest} exceeds Year {self.year} maximum of {self.limit}")
+
+
+class NumberRangeRule(Rule):
+    """Every number in the question must be within the place value range."""
+
+    __slots__ = ("limit",)
+    reads_numbers = True
+
+    def __init__(self, year: int, limit: float):
+        super().__init__(year)
+        self.limit = limit
+
+    def check(self, numbers, answer, issues, suggestions):
+        for num in numbers:
+            if num > self.limit:
+                issues.append(f"Number {num} exceeds Year {self.year} place value range of {self.limit}")
+
+
+class DivisorRule(Rule):
+    """Small numbers (the likely divisors) should come from the divisor list."""
+
+    __slots__ = ("divisors", "valid_divisors")
+    reads_numbers = True
+
+    def __init__(self, year: int, divisors: List[int], valid_divisors: frozenset):
+        super().__init__(year)
+        self.divisors = divisors
+        self.valid_divisors = valid_divisors
+
+    def check(self, numbers, answer, issues, suggestions):
+        for num in numbers:
+            if num in self.valid_divisors:
+                continue  # Valid divisor
+            if num > 10:
+                continue  # Likely the dividend
+            suggestions.append(f"Consider using divisors from {self.divisors}")
+
+
+# Standard key -> rule builder(year, standard, compiled table), in check order
+STANDARD_RULES: List[Tuple[str, Callable[[int, Dict[str, Any], Dict[str, Any]], Rule]]] = [
+    ("tables", lambda year, standard, table: TimesTableRule(year, table["valid_products"])),
+    ("max_product", lambda year, standard, table: AnswerLimitRule(
+        year, standard["max_product"], "Product",
+        f"Consider using smaller factors to keep product under {standard['max_product']}"
+    )),
+    ("max_dividend", lambda year, standard, table: LargestNumberRule(year, standard["max_dividend"], "Dividend")),
+    ("divisors", lambda year, standard, table: DivisorRule(year, standard["divisors"], table["valid_divisors"])),
+    ("max_sum", lambda year, standard, table: AnswerLimitRule(year, standard["max_sum"], "Sum")),
+    ("max_minuend", lambda year, standard, table: LargestNumberRule(year, standard["max_minuend"], "Number")),
+    ("max_number", lambda year, standard, table: NumberRangeRule(year, standard["max_number"]))
+]
+
+
+class TopicRules:
+    """Compiled rules for one (year, topic)."""
+
+    __slots__ = ("year", "topic", "standard", "rules", "reads_numbers")
+
+    def __init__(self, year: int, topic: str, standard: Dict[str, Any]):
+        table = compile_standards({topic: standard})[topic]
+        self.year = year
+        self.topic = topic
+        self.standard = standard
+        self.rules: Tuple[Rule, ...] = tuple(
+            build(year, standard, table) for key, build in STANDARD_RULES if key in standard
+        )
+        self.reads_numbers = any(rule.reads_numbers for rule in self.rules)
+
+    def check(self, numbers: List[int], answer: Any) -> Tuple[List[str], List[str]]:
+        """Run every rule; returns (issues, suggestions)."""
+        issues: List[str] = []
+        suggestions: List[str] = []
+        for rule in self.rules:
+            rule.check(numbers, answer, issues, suggestions)
+        return issues, suggestions
+
+
+class CurriculumRegistry:
+    """
+    Year-group curricula with a (year, topic) -> TopicRules dispatch table.
+
+    Built-in curricula are passed in as standards dicts; the rest are read
+    from year_<n>.json files in data_dir the first time that year is used.
+    Topic rules are compiled on first use and cached, so a question costs
+    one dict probe plus its topic's rules however many years and topics
+    are defined.
+    """
+
+    def __init__(self, builtin: Optional[Dict[int, Dict[str, Dict[str, Any]]]] = None, data_dir: str = CURRICULA_DIR):
+        self.data_dir = data_dir
+        self._standards: Dict[int, Dict[str, Dict[str, Any]]] = dict(builtin or {})
+        self._dispatch: Dict[Tuple[int, str], TopicRules] = {}
+
+    def _path(self, year: int) -> str:
+        """Data file for a year group."""
+        return os.path.join(self.data_dir, f"year_{year}.json")
+
+    def years(self) -> List[int]:
+        """Every year group available, without loading any data files."""
+        years = set(self._standards)
+        for path in glob.glob(os.path.join(self.data_dir, "year_*.json")):
+            name = os.path.basename(path)[len("year_"):-len(".json")]
+            if name.isdigit():
+                years.add(int(name))
+        return sorted(years)
+
+    def standards(self, year: int) -> Dict[str, Dict[str, Any]]:
+        """Topic standards for a year group, loading its data file on first use."""
+        standards = self._standards.get(year)
+        if standards is None:
+            path = self._path(year)
+            if not os.path.exists(path):
+                raise ValueError(f"No curriculum for Year {year}; available years: {self.years()}")
+            with open(path, encoding="utf-8") as f:
+                standards = self._standards[year] = json.load(f)["standards"]
+        return standards
+
+    def topic_rules(self, year: int, topic: str) -> Optional[TopicRules]:
+        """
+        Compiled rules for (year, topic), or None if the year has no such topic.
+        Only real topics are cached: topic strings come from clients, so
+        caching misses would grow the table without bound.
+        """
+        key = (year, topic)
+        rules = self._dispatch.get(key)
+        if rules is None:
+            standard = self.standards(year).get(topic)
+            if standard is None:
+                return None
+            rules = self._dispatch[key] = TopicRules(year, topic, standard)
+        return rules
+
+    def preload(self, years: Optional[Iterable[int]] = None) -> None:
+        """Load and compile every topic up front (e.g. before forking workers)."""
+        for year in self.years() if years is None else years:
+            for topic in self.standards(year):
+                self.topic_rules(year, topic)
+
+    def source_fingerprint(self) -> Dict[str, str]:
+        """Content hash of each curriculum data file, for cache invalidation."""
+        fingerprint = {}
+        for path in sorted(glob.glob(os.path.join(self.data_dir, "year_*.json"))):
+            with open(path, "rb") as f:
+                fingerprint[os.path.basename(path)] = hashlib.sha256(f.read()).hexdigest()[:16]
+        return fingerprint
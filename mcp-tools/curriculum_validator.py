@@ -3,8 +3,15 @@ UK Year 3 Curriculum Validator for Adaptive Maths Tutor
 Validates questions against National Curriculum standards.
 """
 
-from typing import Dict, List, Any, Optional
-import re
+from collections import Counter
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple, Union
+import itertools
+
+import curriculum_rules
+from curriculum_rules import MAX_MULTIPLIER, CurriculumRegistry, TopicRules, compile_standards
+from lexicon import Lexicon
+from question_document import QuestionDocument, source_fingerprint
+from result_types import ValidationResult
 
 TOOL_METADATA = {
     "name": "validate_question",
@@ -24,6 +31,10 @@ TOOL_METADATA = {
         "topic": {
             "type": "string",
             "description": "The curriculum topic (e.g., 'multiplication', 'division', 'word_problems')"
+        },
+        "year": {
+            "type": "integer",
+            "description": "Year group whose standards apply, 2-6 (optional, default 3)"
         }
     },
     "returns": {
@@ -42,40 +53,22 @@ TOOL_METADATA = {
     }
 }
 
-# UK Year 3 National Curriculum Standards
-YEAR_3_STANDARDS = {
-    "multiplication": {
-        "tables": list(range(2, 11)),  # 2-10 times tables
-        "max_product": 100,
-        "description": "Recall and use multiplication facts for 2, 3, 4, 5, 8, 10 tables"
-    },
-    "division": {
-        "max_dividend": 100,
-        "divisors": [2, 3, 4, 5, 8, 10],
-        "description": "Divide numbers up to 100 by 2, 3, 4, 5, 8, 10"
-    },
-    "addition": {
-        "max_sum": 1000,
-        "description": "Add numbers with up to 3 digits using formal written methods"
-    },
-    "subtraction": {
-        "max_minuend": 1000,
-        "description": "Subtract numbers with up to 3 digits using formal written methods"
-    },
-    "place_value": {
-        "max_number": 1000,
-        "description": "Recognise place value of each digit in 3-digit numbers"
-    },
-    "word_problems": {
-        "steps": 1,  # One-step problems
-        "operations": ["addition", "subtraction", "multiplication", "division"],
-        "description": "Solve one-step problems involving all four operations"
-    },
-    "fractions": {
-        "denominators": [2, 3, 4, 5, 8, 10],
-        "description": "Recognise and use fractions with small denominators"
-    }
-}
+# Questions grouped per batch by validate_questions
+DEFAULT_BATCH_SIZE = 1000
+
+# Year group checked when none is given
+DEFAULT_YEAR = 3
+
+# Years 2-6, loaded from curricula/year_<n>.json on first use. Standards are
+# data rather than code, so editing one topic's limits changes only that
+# topic's fingerprint (see bank_revalidation.RuleFingerprints).
+CURRICULA = CurriculumRegistry()
+
+# UK Year 3 National Curriculum Standards (curricula/year_3.json)
+YEAR_3_STANDARDS = CURRICULA.standards(3)
+
+# Lookup tables for YEAR_3_STANDARDS, shared with other tools
+CURRICULUM_TABLES = compile_standards(YEAR_3_STANDARDS)
 
 # Vocabulary appropriate for Year 3 (ages 7-8)
 APPROPRIATE_VOCABULARY = {
@@ -96,10 +89,35 @@ COMPLEX_VOCABULARY = [
     "subsequently", "therefore", "hence", "consequently", "approximately"
 ]
 
+# All keyword lists compiled once; inflected forms count for complex words
+VALIDATOR_LEXICON = Lexicon(
+    {
+        "complex": COMPLEX_VOCABULARY,
+        "context": APPROPRIATE_VOCABULARY["context_words"]
+    },
+    inflect=["complex"]
+)
+
+# Tables the checks read, plus a hash of the check code; cached results are
+# keyed on a hash of these.
+RULE_TABLES = {
+    "checks_source": source_fingerprint(__file__, curriculum_rules.__file__),
+    "year_3_standards": YEAR_3_STANDARDS,
+    "max_multiplier": MAX_MULTIPLIER,
+    "appropriate_vocabulary": APPROPRIATE_VOCABULARY,
+    "complex_vocabulary": COMPLEX_VOCABULARY
+}
+
 
-def validate_question(question: Dict[str, Any], topic: str) -> Dict[str, Any]:
+def validate_question(
+    question: Dict[str, Any],
+    topic: str,
+    document: Optional[QuestionDocument] = None,
+    year: int = DEFAULT_YEAR,
+    compact: bool = False
+) -> Union[Dict[str, Any], ValidationResult]:
     """
-    Validate a question against UK Year 3 curriculum standards.
+    Validate a question against UK curriculum standards (Year 3 by default).
     
     Args:
         question: Dictionary containing:
@@ -108,6 +126,10 @@ def validate_question(question: Dict[str, Any], topic: str) -> Dict[str, Any]:
             - operation: The mathematical operation (optional)
             - numbers_used: Numbers in the question (optional)
         topic: The curriculum topic being assessed
+        document: Parsed question text to reuse (optional, e.g. shared
+            with compare_to_benchmark)
+        year: Year group whose standards apply (2-6)
+        compact: Return a ValidationResult (to_dict() gives the usual dict)
     
     Returns:
         Dictionary containing:
@@ -115,37 +137,126 @@ def validate_question(question: Dict[str, Any], topic: str) -> Dict[str, Any]:
             - issues: List of problems found
             - suggestions: List of improvement suggestions
     """
+    if document is None:
+        document = QuestionDocument.from_question(question)
+    return _validate_document(question, topic, document, year, compact=compact)
+
+
+def validate_questions(
+    questions: Iterable[Tuple[Dict[str, Any], str]],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    summary: Optional[Dict[str, Dict[str, int]]] = None,
+    year: int = DEFAULT_YEAR,
+    compact: bool = False
+) -> Iterator[Union[Dict[str, Any], ValidationResult]]:
+    """
+    Validate many (question, topic) pairs, e.g. a whole question_bank audit.
+    
+    Pairs are read in batches of batch_size and checked grouped by topic:
+    each topic's rules are resolved once per group, numbers are only
+    extracted for topics whose rules read them, and repeated question texts
+    within a batch share one QuestionDocument. Results are yielded in input
+    order, each identical to validate_question's.
+    
+    This is not faster than calling validate_question in a loop unless
+    texts repeat: most of the time goes on tokenizing and scanning each
+    text's vocabulary, which no grouping can share. Use it for the running
+    summary and the bounded memory of a streamed audit; for throughput on
+    unique texts use parallel_runner.validate_questions_parallel.
+    
+    Args:
+        questions: Iterable of (question, topic) pairs
+        batch_size: Pairs grouped together per batch
+        summary: Optional dict updated in place with per-topic
+            {"total", "valid", "invalid"} counts as results are produced
+        year: Year group whose standards apply to every pair
+        compact: Yield ValidationResult objects instead of dicts
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    if summary is None:
+        summary = {}
+    
+    iterator = iter(questions)
+    while True:
+        batch = list(itertools.islice(iterator, batch_size))
+        if not batch:
+            break
+        
+        by_topic: Dict[str, List[int]] = {}
+        for i, (_, topic) in enumerate(batch):
+            by_topic.setdefault(topic, []).append(i)
+        
+        # Only texts that repeat within the batch are worth keeping documents for
+        texts = [question.get("text", "") for question, _ in batch]
+        documents: Dict[str, Optional[QuestionDocument]] = {
+            text: None for text, count in Counter(texts).items() if count > 1
+        }
+        results: List[Optional[Dict[str, Any]]] = [None] * len(batch)
+        
+        for topic, indices in by_topic.items():
+            topic_rules = CURRICULA.topic_rules(year, topic)
+            valid = 0
+            for i in indices:
+                question = batch[i][0]
+                text = texts[i]
+                if text in documents:
+                    document = documents[text]
+                    if document is None:
+                        document = documents[text] = QuestionDocument(text)
+                else:
+                    document = QuestionDocument(text)
+                result = results[i] = _validate_document(question, topic, document, year, topic_rules, compact)
+                valid += result.is_valid if compact else result["is_valid"]
+            counts = summary.setdefault(topic, {"total": 0, "valid": 0, "invalid": 0})
+            counts["total"] += len(indices)
+            counts["valid"] += valid
+            counts["invalid"] += len(indices) - valid
+        
+        yield from results
+
+
+def _validate_document(
+    question: Dict[str, Any],
+    topic: str,
+    document: QuestionDocument,
+    year: int = DEFAULT_YEAR,
+    topic_rules: Optional[TopicRules] = None,
+    compact: bool = False
+) -> Union[Dict[str, Any], ValidationResult]:
+    """Run the validation steps against a parsed question text."""
     issues = []
     suggestions = []
     
-    text = question.get("text", "")
-    answer = question.get("answer")
-    numbers_used = question.get("numbers_used", _extract_numbers(text))
-    operation = question.get("operation", _infer_operation(text))
+    if topic_rules is None:
+        topic_rules = CURRICULA.topic_rules(year, topic)
     
     # Validate based on topic
-    if topic in YEAR_3_STANDARDS:
-        standard = YEAR_3_STANDARDS[topic]
-        topic_issues, topic_suggestions = _validate_topic_standards(
-            topic, numbers_used, answer, operation, standard
-        )
+    if topic_rules is not None:
+        numbers_used = question.get("numbers_used")
+        if numbers_used is None:
+            # Numbers are only extracted for topics whose rules read them
+            numbers_used = document.numbers if topic_rules.reads_numbers else []
+        topic_issues, topic_suggestions = topic_rules.check(numbers_used, question.get("answer"))
         issues.extend(topic_issues)
         suggestions.extend(topic_suggestions)
     else:
-        suggestions.append(f"Topic '{topic}' not in standard curriculum list. Consider using: {list(YEAR_3_STANDARDS.keys())}")
+        suggestions.append(f"Topic '{topic}' not in standard curriculum list. Consider using: {list(CURRICULA.standards(year).keys())}")
     
     # Validate vocabulary
-    vocab_issues, vocab_suggestions = _validate_vocabulary(text)
+    vocab_issues, vocab_suggestions = _validate_vocabulary(document, year)
     issues.extend(vocab_issues)
     suggestions.extend(vocab_suggestions)
     
     # Validate question structure
-    structure_issues, structure_suggestions = _validate_structure(text, topic)
+    structure_issues, structure_suggestions = _validate_structure(document, topic)
     issues.extend(structure_issues)
     suggestions.extend(structure_suggestions)
     
     is_valid = len(issues) == 0
     
+    if compact:
+        return ValidationResult(is_valid, issues, suggestions)
     return {
         "is_valid": is_valid,
         "issues": issues,
@@ -153,116 +264,30 @@ def validate_question(question: Dict[str, Any], topic: str) -> Dict[str, Any]:
     }
 
 
-def _extract_numbers(text: str) -> List[int]:
-    """Extract all numbers from question text."""
-    numbers = re.findall(r'\b\d+\b', text)
-    return [int(n) for n in numbers]
-
-
-def _infer_operation(text: str) -> Optional[str]:
-    """Infer the mathematical operation from question text."""
-    text_lower = text.lower()
-    
-    if any(word in text_lower for word in ["times", "multiply", "groups of", "lots of"]):
-        return "multiplication"
-    elif any(word in text_lower for word in ["divide", "share", "split", "equal groups"]):
-        return "division"
-    elif any(word in text_lower for word in ["add", "plus", "more", "total", "altogether"]):
-        return "addition"
-    elif any(word in text_lower for word in ["subtract", "minus", "take away", "less", "fewer"]):
-        return "subtraction"
-    
-    return None
-
-
-def _validate_topic_standards(
-    topic: str, 
-    numbers: List[int], 
-    answer: Any,
-    operation: Optional[str],
-    standard: Dict[str, Any]
-) -> tuple[List[str], List[str]]:
-    """Validate against topic-specific standards."""
-    issues = []
-    suggestions = []
-    
-    if topic == "multiplication":
-        # Check times tables range
-        for num in numbers:
-            if num > 10 and num not in [n * m for n in range(2, 11) for m in range(1, 13)]:
-                issues.append(f"Number {num} may be outside Year 3 multiplication range")
-        
-        if answer and answer > standard["max_product"]:
-            issues.append(f"Product {answer} exceeds Year 3 maximum of {standard['max_product']}")
-            suggestions.append("Consider using smaller factors to keep product under 100")
-    
-    elif topic == "division":
-        if numbers:
-            dividend = max(numbers)
-            if dividend > standard["max_dividend"]:
-                issues.append(f"Dividend {dividend} exceeds Year 3 maximum of {standard['max_dividend']}")
-        
-        # Check divisors
-        for num in numbers:
-            if num in [2, 3, 4, 5, 8, 10]:
-                continue  # Valid divisor
-            if num > 10:
-                continue  # Likely the dividend
-            if num not in standard["divisors"]:
-                suggestions.append(f"Consider using divisors from {standard['divisors']}")
-    
-    elif topic == "addition":
-        if answer and answer > standard["max_sum"]:
-            issues.append(f"Sum {answer} exceeds Year 3 maximum of {standard['max_sum']}")
-    
-    elif topic == "subtraction":
-        if numbers and max(numbers) > standard["max_minuend"]:
-            issues.append(f"Number {max(numbers)} exceeds Year 3 maximum of {standard['max_minuend']}")
-    
-    elif topic == "word_problems":
-        # Check for multi-step problems
-        operation_count = sum(1 for op in ["add", "subtract", "multiply", "divide", "plus", "minus", "times"]
-                             if op in str(numbers).lower())
-        if operation_count > 1:
-            issues.append("Year 3 word problems should be one-step only")
-            suggestions.append("Simplify to a single operation")
-    
-    elif topic == "place_value":
-        for num in numbers:
-            if num > standard["max_number"]:
-                issues.append(f"Number {num} exceeds Year 3 place value range of {standard['max_number']}")
-    
-    return issues, suggestions
-
-
-def _validate_vocabulary(text: str) -> tuple[List[str], List[str]]:
+def _validate_vocabulary(document: QuestionDocument, year: int = DEFAULT_YEAR) -> tuple[List[str], List[str]]:
     """Check vocabulary is age-appropriate."""
     issues = []
     suggestions = []
     
-    text_lower = text.lower()
-    
     # Check for complex vocabulary
-    for word in COMPLEX_VOCABULARY:
-        if word in text_lower:
-            issues.append(f"Vocabulary '{word}' may be too complex for Year 3")
-            suggestions.append(f"Consider simpler alternatives for '{word}'")
+    for word in document.hits(VALIDATOR_LEXICON).get("complex", []):
+        issues.append(f"Vocabulary '{word}' may be too complex for Year {year}")
+        suggestions.append(f"Consider simpler alternatives for '{word}'")
     
     # Check sentence length (Year 3 should have shorter sentences)
-    sentences = text.split('.')
-    for sentence in sentences:
-        word_count = len(sentence.split())
+    for word_count in document.sentence_lengths:
         if word_count > 20:
-            suggestions.append("Consider shorter sentences (under 20 words) for Year 3")
+            suggestions.append(f"Consider shorter sentences (under 20 words) for Year {year}")
             break
     
     return issues, suggestions
 
 
-def _validate_structure(text: str, topic: str) -> tuple[List[str], List[str]]:
+def _validate_structure(document: QuestionDocument, topic: str) -> tuple[List[str], List[str]]:
     """Validate question structure."""
     issues = []
     suggestions = []
+    text = document.text
     
     # Check for question mark
     if '?' not in text:
@@ -274,7 +299,7 @@ def _validate_structure(text: str, topic: str) -> tuple[List[str], List[str]]:
     
     # For word problems, check for context
     if topic == "word_problems":
-        has_context = any(word in text.lower() for word in APPROPRIATE_VOCABULARY["context_words"])
+        has_context = "context" in document.hits(VALIDATOR_LEXICON)
         if not has_context:
             suggestions.append("Word problems should include real-world context (e.g., apples, toys, books)")
     
@@ -0,0 +1,228 @@
+"""
+Near-Duplicate Question Index for Adaptive Maths Tutor
+MinHash / LSH index for spotting reworded copies of existing questions.
+"""
+
+from typing import Dict, List, Any, Hashable, Iterable, Optional, Set, Tuple
+import zlib
+
+import numpy as np
+
+from benchmark_checker import CHILD_NAMES
+from question_document import QuestionDocument
+
+DEFAULT_NUM_PERM = 128
+DEFAULT_THRESHOLD = 0.7
+DEFAULT_SHINGLE_SIZE = 3
+
+NAME_TOKEN = "<name>"
+NUMBER_TOKEN = "<num>"
+
+# Mersenne prime modulus for the permutation hashes (a * x + b) mod p
+_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_CHILD_NAME_TOKENS = frozenset(name.lower() for name in CHILD_NAMES)
+
+
+def shingles(
+    document: QuestionDocument,
+    size: int = DEFAULT_SHINGLE_SIZE,
+    mask_names: bool = True,
+    mask_numbers: bool = True
+) -> Set[str]:
+    """
+    Word n-grams of the question's tokens.
+
+    Tokens are the lowercased words the QA tools match on. CHILD_NAMES and
+    numbers can be replaced by placeholders, so "Emma has 24 stickers" and
+    "Sam has 30 stickers" shingle identically. Texts shorter than size
+    words give one shingle of all their words.
+    """
+    tokens = document.tokens
+    if mask_names or mask_numbers:
+        tokens = [
+            NAME_TOKEN if mask_names and token in _CHILD_NAME_TOKENS
+            else NUMBER_TOKEN if mask_numbers and token.isdigit()
+            else token
+            for token in tokens
+        ]
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def choose_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows == num_perm whose LSH threshold
+    (1 / bands) ** (1 / rows) is closest to the target similarity.
+    """
+    options = [(b, num_perm // b) for b in range(1, num_perm + 1) if num_perm % b == 0]
+    return min(options, key=lambda option: abs((1 / option[0]) ** (1 / option[1]) - threshold))
+
+
+class DuplicateIndex:
+    """
+    MinHash signatures bucketed by LSH bands.
+
+    Inserting and querying hash the question once and probe one bucket per
+    band, so a query only compares against questions that share a band
+    with it rather than the whole bank. Similarity is the estimated Jaccard
+    similarity of the two questions' shingle sets.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        mask_names: bool = True,
+        mask_numbers: bool = True,
+        seed: int = 1
+    ):
+        if not 0 < threshold <= 1:
+            raise ValueError("threshold must be in (0, 1]")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.mask_names = mask_names
+        self.mask_numbers = mask_numbers
+        self.bands, self.rows = choose_bands(num_perm, threshold)
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MAX_HASH, size=num_perm, dtype=np.uint64)
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(self.bands)]
+
+    def signature(self, question: Any) -> np.ndarray:
+        """MinHash signature of a question dict, text or QuestionDocument."""
+        document = _as_document(question)
+        hashes = np.fromiter(
+            (zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(
+                document, self.shingle_size, self.mask_names, self.mask_numbers
+            )),
+            dtype=np.uint64
+        )
+        if hashes.size == 0:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        # (num_perm x shingles) permuted hashes; a * x fits in 64 bits as both are < 2**32
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        """One bucket key per band."""
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def add(self, key: Hashable, question: Any) -> None:
+        """Insert (or replace) a question under key."""
+        self._add_signature(key, self.signature(question))
+
+    def _add_signature(self, key: Hashable, signature: np.ndarray) -> None:
+        """Insert a precomputed signature under key."""
+        if key in self._signatures:
+            self.remove(key)
+        self._signatures[key] = signature
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(band_key, []).append(key)
+
+    def remove(self, key: Hashable) -> None:
+        """Drop a question from the index."""
+        signature = self._signatures.pop(key)
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            keys = bucket[band_key]
+            keys.remove(key)
+            if not keys:
+                del bucket[band_key]
+
+    def query(self, question: Any, threshold: Optional[float] = None) -> List[Tuple[Hashable, float]]:
+        """(key, similarity) of indexed questions at or above threshold, most similar first."""
+        return self._query_signature(self.signature(question), threshold)
+
+    def _query_signature(self, signature: np.ndarray, threshold: Optional[float] = None) -> List[Tuple[Hashable, float]]:
+        """query() for a precomputed signature."""
+        if threshold is None:
+            threshold = self.threshold
+        candidates: Set[Hashable] = set()
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(band_key, ()))
+
+        if not candidates:
+            return []
+        keys = list(candidates)
+        stacked = np.stack([self._signatures[key] for key in keys])
+        similarities = np.count_nonzero(stacked == signature, axis=1) / self.num_perm
+        matches = [
+            (key, float(similarity)) for key, similarity in zip(keys, similarities)
+            if similarity >= threshold
+        ]
+        matches.sort(key=lambda match: -match[1])
+        return matches
+
+    def find_duplicate(self, question: Any) -> Optional[Tuple[Hashable, float]]:
+        """The most similar indexed question above the threshold, or None."""
+        matches = self.query(question)
+        return matches[0] if matches else None
+
+    def add_if_new(self, key: Hashable, question: Any) -> Optional[Tuple[Hashable, float]]:
+        """
+        Insert a question unless it near-duplicates one already indexed.
+
+        Returns the (key, similarity) it duplicates, or None if it was added.
+        """
+        signature = self.signature(question)
+        matches = self._query_signature(signature)
+        if matches:
+            return matches[0]
+        self._add_signature(key, signature)
+        return None
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._signatures
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size and LSH layout."""
+        return {
+            "questions": len(self._signatures),
+            "bands": self.bands,
+            "rows_per_band": self.rows,
+            "threshold": self.threshold,
+            "buckets": sum(len(bucket) for bucket in self._buckets)
+        }
+
+
+def _as_document(question: Any) -> QuestionDocument:
+    """Accept a question dict, raw text or QuestionDocument."""
+    if isinstance(question, QuestionDocument):
+        return question
+    if isinstance(question, dict):
+        return QuestionDocument.from_question(question)
+    return QuestionDocument(question)
+
+
+def build_index(questions: Iterable[Tuple[Hashable, Any]], **options: Any) -> DuplicateIndex:
+    """Index (key, question) pairs, e.g. an existing question_bank."""
+    index = DuplicateIndex(**options)
+    for key, question in questions:
+        index.add(key, question)
+    return index
+
+
+# Example usage
+if __name__ == "__main__":
+    index = build_index([
+        ("q1", "Emma has 24 stickers. She shares them equally among 4 friends. How many stickers does each friend get?"),
+        ("q2", "Tom has 5 bags with 3 apples in each bag. How many apples does Tom have altogether?")
+    ])
+
+    candidates = [
+        "Sam has 30 stickers. She shares them equally among 5 friends. How many stickers does each friend get?",
+        "Lily buys 4 packs of pencils with 6 pencils in each pack. How many pencils does she buy?"
+    ]
+    for i, text in enumerate(candidates):
+        duplicate = index.add_if_new(f"new{i}", text)
+        print(f"{text[:40]}... -> {'duplicate of ' + str(duplicate) if duplicate else 'added'}")
+    print("Index Stats:", index.stats())
@@ -0,0 +1,261 @@
+"""
+Stage Instrumentation for Adaptive Maths Tutor
+Opt-in call counts, latency histograms and input sizes for the tools' internal stages.
+"""
+
+from typing import Dict, List, Any, Callable, Iterator, Optional, Tuple
+import bisect
+import contextlib
+import functools
+import importlib
+import json
+import threading
+import time
+
+# Histogram upper bounds (seconds / input units); a final +Inf bucket is implied
+LATENCY_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                   0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024, 4096)
+
+METRIC_PREFIX = "mcp_tool_stage"
+
+# stage name -> (module, attribute path, input size of the call's arguments)
+# Sizes: topics scored, sessions, weak topics, characters of question text,
+# numbers checked against the year's standard.
+STAGES: Dict[str, Tuple[str, str, Callable[..., int]]] = {
+    "identify_weak_topics": ("student_analyzer", "_identify_weak_topics", lambda scores: len(scores)),
+    "analyze_session_trends": ("student_analyzer", "_analyze_session_trends", lambda sessions: len(sessions)),
+    "generate_focus_areas": ("student_analyzer", "_generate_focus_areas", lambda weak_topics, *_: len(weak_topics)),
+    "validate_document": (
+        "curriculum_validator", "_validate_document", lambda question, topic, document, *_, **__: len(document.text)
+    ),
+    "validate_standards": ("curriculum_rules", "TopicRules.check", lambda rules, numbers, answer: len(numbers)),
+    "validate_vocabulary": ("curriculum_validator", "_validate_vocabulary", lambda document, *_: len(document.text)),
+    "validate_structure": ("curriculum_validator", "_validate_structure", lambda document, *_: len(document.text)),
+    "check_real_world_context": (
+        "benchmark_checker", "_check_real_world_context", lambda document, *_: len(document.text)
+    ),
+    "check_clear_language": ("benchmark_checker", "_check_clear_language", lambda document: len(document.text)),
+    "check_age_appropriate": ("benchmark_checker", "_check_age_appropriate", lambda document: len(document.text)),
+    "check_concrete_objects": (
+        "benchmark_checker", "_check_concrete_objects", lambda document, *_: len(document.text)
+    )
+}
+
+
+class StageMetrics:
+    """Counters and histograms for one stage."""
+
+    __slots__ = ("calls", "errors", "latency_sum", "latency_counts", "size_sum", "size_max", "size_counts")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.latency_sum = 0.0
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.size_sum = 0
+        self.size_max = 0
+        self.size_counts = [0] * (len(SIZE_BUCKETS) + 1)
+
+    def record(self, elapsed: float, size: int, failed: bool) -> None:
+        """Add one call."""
+        self.calls += 1
+        if failed:
+            self.errors += 1
+        self.latency_sum += elapsed
+        self.latency_counts[bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        self.size_sum += size
+        if size > self.size_max:
+            self.size_max = size
+        self.size_counts[bisect.bisect_left(SIZE_BUCKETS, size)] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """JSON-friendly copy with cumulative histogram buckets."""
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "latency_seconds": {
+                "sum": round(self.latency_sum, 9),
+                "mean": round(self.latency_sum / self.calls, 9) if self.calls else 0.0,
+                "buckets": _cumulative(LATENCY_BUCKETS, self.latency_counts)
+            },
+            "input_size": {
+                "sum": self.size_sum,
+                "max": self.size_max,
+                "mean": round(self.size_sum / self.calls, 2) if self.calls else 0.0,
+                "buckets": _cumulative(SIZE_BUCKETS, self.size_counts)
+            }
+        }
+
+
+class Instrumentation:
+    """
+    Registry of stage metrics plus the wrappers that feed it.
+
+    Enabling swaps each stage function in its module (or class) for a
+    timing wrapper; disabling puts the original back. The stages are
+    called through module globals, so while disabled the tools run their
+    unmodified code with no per-call cost at all.
+    """
+
+    def __init__(self, stages: Optional[Dict[str, Tuple[str, str, Callable[..., int]]]] = None):
+        self.stages = dict(STAGES if stages is None else stages)
+        self.metrics: Dict[str, StageMetrics] = {name: StageMetrics() for name in self.stages}
+        self._originals: Dict[str, Tuple[Any, str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._originals)
+
+    def enable(self) -> None:
+        """Install the wrappers (idempotent)."""
+        if self.enabled:
+            return
+        for name, (module_name, path, size_of) in self.stages.items():
+            owner: Any = importlib.import_module(module_name)
+            *parents, attribute = path.split(".")
+            for parent in parents:
+                owner = getattr(owner, parent)
+            original = owner.__dict__[attribute]
+            self._originals[name] = (owner, attribute, original)
+            setattr(owner, attribute, self._wrap(name, original, size_of))
+
+    def disable(self) -> None:
+        """Restore the original functions; recorded metrics are kept."""
+        for owner, attribute, original in self._originals.values():
+            setattr(owner, attribute, original)
+        self._originals.clear()
+
+    def _wrap(self, name: str, func: Callable[..., Any], size_of: Callable[..., int]) -> Callable[..., Any]:
+        """Timing wrapper that records into the stage's metrics."""
+        metrics = self.metrics[name]
+        lock = self._lock
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = clock()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed = clock() - start
+                try:
+                    size = size_of(*args, **kwargs)
+                except Exception:
+                    size = 0
+                with lock:
+                    metrics.record(elapsed, size, failed)
+
+        return wrapper
+
+    def reset(self) -> None:
+        """Zero every stage's metrics."""
+        with self._lock:
+            for metrics in self.metrics.values():
+                metrics.__init__()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Metrics for every stage that has been called, keyed by stage name."""
+        with self._lock:
+            return {name: metrics.snapshot() for name, metrics in self.metrics.items() if metrics.calls}
+
+    def to_json(self) -> str:
+        """snapshot() as a JSON document stamped with the capture time."""
+        return json.dumps({"timestamp": time.time(), "stages": self.snapshot()}, indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (histograms plus call/error counters)."""
+        snapshot = self.snapshot()
+        lines: List[str] = []
+        for metric, kind, help_text in (
+            ("calls_total", "counter", "Stage calls"),
+            ("errors_total", "counter", "Stage calls that raised"),
+            ("duration_seconds", "histogram", "Stage latency"),
+            ("input_size", "histogram", "Stage input size"),
+            ("input_size_max", "gauge", "Largest stage input seen")
+        ):
+            lines.append(f"# HELP {METRIC_PREFIX}_{metric} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{metric} {kind}")
+            for stage, values in snapshot.items():
+                label = f'stage="{stage}"'
+                if metric == "calls_total":
+                    lines.append(f"{METRIC_PREFIX}_{metric}{{{label}}} {values['calls']}")
+                elif metric == "errors_total":
+                    lines.append(f"{METRIC_PREFIX}_{metric}{{{label}}} {values['errors']}")
+                elif metric == "input_size_max":
+                    lines.append(f"{METRIC_PREFIX}_{metric}{{{label}}} {values['input_size']['max']}")
+                else:
+                    histogram = values["latency_seconds" if metric == "duration_seconds" else "input_size"]
+                    for bound, count in histogram["buckets"]:
+                        lines.append(f'{METRIC_PREFIX}_{metric}_bucket{{{label},le="{bound}"}} {count}')
+                    lines.append(f"{METRIC_PREFIX}_{metric}_sum{{{label}}} {histogram['sum']}")
+                    lines.append(f"{METRIC_PREFIX}_{metric}_count{{{label}}} {values['calls']}")
+        return "\n".join(lines) + "\n"
+
+
+def _cumulative(bounds: Tuple[float, ...], counts: List[int]) -> List[Tuple[str, int]]:
+    """Per-bucket counts as cumulative (le, count) pairs ending with +Inf."""
+    pairs = []
+    total = 0
+    for bound, count in zip(list(bounds) + ["+Inf"], counts):
+        total += count
+        pairs.append((str(bound), total))
+    return pairs
+
+
+# Process-wide instance used by the helpers below
+INSTRUMENTATION = Instrumentation()
+
+
+def enable() -> None:
+    """Start recording stage metrics."""
+    INSTRUMENTATION.enable()
+
+
+def disable() -> None:
+    """Stop recording stage metrics."""
+    INSTRUMENTATION.disable()
+
+
+@contextlib.contextmanager
+def instrumented(reset: bool = False) -> Iterator[Instrumentation]:
+    """Record stage metrics for the duration of a with block."""
+    if reset:
+        INSTRUMENTATION.reset()
+    was_enabled = INSTRUMENTATION.enabled
+    INSTRUMENTATION.enable()
+    try:
+        yield INSTRUMENTATION
+    finally:
+        if not was_enabled:
+            INSTRUMENTATION.disable()
+
+
+# Example usage
+if __name__ == "__main__":
+    from benchmark_checker import compare_to_benchmark
+    from curriculum_validator import validate_question
+    from student_analyzer import analyze_student_gaps
+
+    question = {
+        "text": "Emma has 24 stickers. She shares them equally among 4 friends. How many stickers does each friend get?",
+        "answer": 6
+    }
+    student = {
+        "diagnostic_scores": {"multiplication_tables": 45, "division": 62, "place_value": 80},
+        "recent_sessions": [
+            {"questions_correct": 6, "questions_total": 10, "topics_covered": {"division": 60}},
+            {"questions_correct": 8, "questions_total": 10, "topics_covered": {"division": 80}}
+        ]
+    }
+
+    with instrumented() as metrics:
+        for _ in range(100):
+            analyze_student_gaps(student)
+            validate_question(question, "division")
+            compare_to_benchmark(question, "division")
+    print(metrics.to_prometheus())
@@ -0,0 +1,136 @@
+"""
+Keyword Lexicon Matcher for Adaptive Maths Tutor
+Finds every keyword-list hit in a question with one pass over its words.
+"""
+
+from typing import Dict, List, Iterable, Optional, Set, Tuple
+import re
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+_VOWELS = set("aeiou")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words and numbers in text, split on everything else."""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def inflections(term: str) -> Set[str]:
+    """
+    Common English inflections of a single word (share -> shares, shared,
+    sharing). Words ending consonant-vowel-consonant also get the doubled
+    forms (shop -> shopping, shopped; win -> winning). Extra forms that are
+    not real words never appear in questions, so they cost nothing.
+    """
+    forms = {term, term + "s", term + "es", term + "ed", term + "ing"}
+    if (len(term) >= 3 and term[-1] not in _VOWELS and term[-1] not in "wxy"
+            and term[-2] in _VOWELS and term[-3] not in _VOWELS):
+        forms.update({term + term[-1] + "ed", term + term[-1] + "ing"})
+    if term.endswith("e"):
+        forms.update({term + "d", term[:-1] + "ing"})
+    if term.endswith("y"):
+        forms.update({term[:-1] + "ies", term[:-1] + "ied"})
+    return forms
+
+
+class Lexicon:
+    """
+    Compiled matcher for named keyword lists.
+
+    Terms match whole words only ("car" does not match "card"). Multi-word
+    terms ("take away", "how many") match consecutive words. Categories
+    listed in inflect also match inflected forms of single-word terms.
+    All lookups are hash probes, so scanning costs O(words in text)
+    however many terms are registered.
+    """
+
+    def __init__(self, categories: Dict[str, Iterable[str]], inflect: Iterable[str] = ()):
+        inflect = set(inflect)
+        unknown = inflect - set(categories)
+        if unknown:
+            raise ValueError(f"Cannot inflect unknown categories: {sorted(unknown)}")
+
+        self.categories = list(categories)
+        self._terms = {category: tuple(terms) for category, terms in categories.items()}
+        self._inflect = inflect
+        # surface form -> ((category, canonical term), ...)
+        self._forms: Dict[str, Tuple[Tuple[str, str], ...]] = {}
+        self._phrase_starts: Set[str] = set()
+        self._max_words = 1
+
+        entries: Dict[str, List[Tuple[str, str]]] = {}
+        for category, terms in self._terms.items():
+            for term in terms:
+                words = tokenize(term)
+                if not words:
+                    continue
+                canonical = " ".join(words)
+                if len(words) == 1 and category in inflect:
+                    forms = inflections(canonical)
+                else:
+                    forms = {canonical}
+                    if len(words) > 1:
+                        self._phrase_starts.add(words[0])
+                        self._max_words = max(self._max_words, len(words))
+                for form in forms:
+                    hit = (category, canonical)
+                    bucket = entries.setdefault(form, [])
+                    if hit not in bucket:
+                        bucket.append(hit)
+
+        self._forms = {form: tuple(hits) for form, hits in entries.items()}
+        self._form_set = frozenset(self._forms)
+
+    def subset(self, categories: Iterable[str]) -> "Lexicon":
+        """Lexicon matching only some of this one's categories, with the same inflection settings."""
+        categories = list(categories)
+        return Lexicon(
+            {category: self._terms[category] for category in categories},
+            inflect=[category for category in categories if category in self._inflect]
+        )
+
+    def scan(self, text: str, tokens: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """
+        Return {category: [terms found]} for every category with a hit.
+
+        Terms are canonical (as listed, not as inflected in the text), each
+        listed once, in order of first appearance. Pass tokens to reuse an
+        existing tokenize(text) result.
+        """
+        if tokens is None:
+            tokens = tokenize(text)
+        forms = self._forms
+        hits: Dict[str, List[str]] = {}
+
+        # Most words hit nothing; find the ones that can with C-level set operations
+        token_set = set(tokens)
+        matched = token_set & self._form_set
+        starts = token_set & self._phrase_starts
+        if not matched and not starts:
+            return hits
+
+        # (position, words, surface form) for every candidate that has hits
+        found = [(tokens.index(token), 1, token) for token in matched]
+        for start in starts:
+            i = tokens.index(start)
+            while True:
+                for n in range(2, self._max_words + 1):
+                    if i + n > len(tokens):
+                        break
+                    phrase = " ".join(tokens[i:i + n])
+                    if phrase in forms:
+                        found.append((i, n, phrase))
+                try:
+                    i = tokens.index(start, i + 1)
+                except ValueError:
+                    break
+        found.sort()
+
+        for _, _, form in found:
+            for category, term in forms[form]:
+                terms = hits.setdefault(category, [])
+                if term not in terms:
+                    terms.append(term)
+
+        return hits
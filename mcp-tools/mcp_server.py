@@ -0,0 +1,404 @@
+"""
+Python MCP Server for Adaptive Maths Tutor
+Asyncio JSON-RPC server for the three tools, with batching and call coalescing.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Any, Callable, Optional, Tuple
+import asyncio
+import inspect
+import json
+import multiprocessing
+import os
+import time
+
+import benchmark_checker
+import curriculum_validator
+import student_analyzer
+
+SERVER_NAME = "numbersense-mcp"
+SERVER_VERSION = "1.0.0"
+PROTOCOL_VERSION = "2025-03-26"
+
+DEFAULT_PORT = 3000
+DEFAULT_MAX_WORKERS = 2
+
+# Calls to the same tool arriving within this window share one worker task
+DEFAULT_COALESCE_WINDOW = 0.002
+DEFAULT_MAX_COALESCED = 64
+
+# Calls accepted but not yet answered; further calls wait for room
+DEFAULT_MAX_PENDING = 1024
+
+MAX_BODY_BYTES = 4 * 1024 * 1024
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+SERVER_ERROR = -32000
+
+TOOLS: Dict[str, Tuple[Dict[str, Any], Callable[..., Dict[str, Any]]]] = {
+    student_analyzer.TOOL_METADATA["name"]: (student_analyzer.TOOL_METADATA, student_analyzer.analyze_student_gaps),
+    curriculum_validator.TOOL_METADATA["name"]: (curriculum_validator.TOOL_METADATA, curriculum_validator.validate_question),
+    benchmark_checker.TOOL_METADATA["name"]: (benchmark_checker.TOOL_METADATA, benchmark_checker.compare_to_benchmark)
+}
+
+HTTP_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found",
+                405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def tool_definition(metadata: Dict[str, Any], func: Callable[..., Any]) -> Dict[str, Any]:
+    """MCP tools/list entry built from a module's TOOL_METADATA; parameters without a default are required."""
+    signature = inspect.signature(func)
+    return {
+        "name": metadata["name"],
+        "description": metadata["description"],
+        "inputSchema": {
+            "type": "object",
+            "properties": metadata["parameters"],
+            "required": [
+                name for name in metadata["parameters"]
+                if name in signature.parameters and signature.parameters[name].default is inspect.Parameter.empty
+            ]
+        }
+    }
+
+
+def run_tool_calls(name: str, calls: List[Dict[str, Any]]) -> List[Tuple[bool, Any]]:
+    """
+    Run coalesced calls to one tool, returning (ok, result or error message)
+    per call. Runs inside the worker pool.
+
+    validate_question calls for the same year go through validate_questions,
+    which groups them by topic; if that batch fails, its calls are rerun one
+    by one so a bad call only fails itself. Calls whose year is not a known
+    year group skip the batch and fail on their own.
+    """
+    outcomes: List[Optional[Tuple[bool, Any]]] = [None] * len(calls)
+    if name == "validate_question":
+        years = set(curriculum_validator.CURRICULA.years())
+        by_year: Dict[int, List[int]] = {}
+        for i, arguments in enumerate(calls):
+            year = arguments.get("year", curriculum_validator.DEFAULT_YEAR)
+            if type(year) is int and year in years:
+                by_year.setdefault(year, []).append(i)
+        for year, indices in by_year.items():
+            try:
+                results = list(curriculum_validator.validate_questions(
+                    ((calls[i]["question"], calls[i]["topic"]) for i in indices), year=year
+                ))
+            except Exception:
+                continue
+            for i, result in zip(indices, results):
+                outcomes[i] = (True, result)
+
+    func = TOOLS[name][1]
+    for i, arguments in enumerate(calls):
+        if outcomes[i] is None:
+            try:
+                outcomes[i] = (True, func(**arguments))
+            except Exception as error:
+                outcomes[i] = (False, f"{type(error).__name__}: {error}")
+    return outcomes
+
+
+class ToolCoalescer:
+    """
+    Groups calls to one tool into worker tasks.
+
+    The first call after an idle period opens a window of window seconds
+    (or until max_batch calls queue up); everything queued by then goes to
+    the pool as one task, so bursts pay one dispatch and pickling round
+    trip instead of one per call.
+    """
+
+    def __init__(self, name: str, executor: Executor, window: float, max_batch: int):
+        self.name = name
+        self.executor = executor
+        self.window = window
+        self.max_batch = max_batch
+        self.batches = 0
+        self.calls = 0
+        self._pending: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._full: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def call(self, arguments: Dict[str, Any]) -> Tuple[bool, Any]:
+        """Queue one call and wait for its (ok, result) outcome."""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((arguments, future))
+        if self._flusher is None:
+            self._full = asyncio.Event()
+            self._flusher = asyncio.ensure_future(self._flush_after_window())
+        elif len(self._pending) >= self.max_batch:
+            self._full.set()
+        return await future
+
+    async def _flush_after_window(self) -> None:
+        """Wait out the window, then send the queued calls to the pool."""
+        try:
+            await asyncio.wait_for(self._full.wait(), self.window)
+        except asyncio.TimeoutError:
+            pass
+        batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+        if self._pending:
+            self._full = asyncio.Event()
+            self._full.set()
+            self._flusher = asyncio.ensure_future(self._flush_after_window())
+        else:
+            self._flusher = None
+        self.batches += 1
+        self.calls += len(batch)
+        loop = asyncio.get_running_loop()
+        try:
+            outcomes = await loop.run_in_executor(
+                self.executor, run_tool_calls, self.name, [arguments for arguments, _ in batch]
+            )
+        except Exception as error:
+            outcomes = [(False, f"{type(error).__name__}: {error}")] * len(batch)
+        for (_, future), outcome in zip(batch, outcomes):
+            if not future.done():
+                future.set_result(outcome)
+
+
+class MCPServer:
+    """
+    Stateless MCP server over HTTP, matching the TypeScript server's routes:
+    POST /mcp for JSON-RPC (single requests or batches) and GET /health.
+
+    Tool work runs on a bounded worker pool (default: max_workers
+    processes) and same-tool calls are coalesced per ToolCoalescer.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        executor: Optional[Executor] = None,
+        coalesce_window: float = DEFAULT_COALESCE_WINDOW,
+        max_coalesced: int = DEFAULT_MAX_COALESCED,
+        max_pending: int = DEFAULT_MAX_PENDING
+    ):
+        self._owns_executor = executor is None
+        if executor is None:
+            # Forked workers would inherit open client sockets and hold connections open
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+        self.executor = executor
+        self.coalescers = {
+            name: ToolCoalescer(name, self.executor, coalesce_window, max_coalesced) for name in TOOLS
+        }
+        self.max_pending = max_pending
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.requests = 0
+        self.started = time.time()
+
+    # JSON-RPC
+
+    async def handle_payload(self, payload: Any) -> Optional[Any]:
+        """Answer a decoded JSON-RPC message or batch; None when nothing needs a reply."""
+        if isinstance(payload, list):
+            if not payload:
+                return _error(None, INVALID_REQUEST, "Invalid Request: empty batch")
+            responses = await asyncio.gather(*(self.handle_message(message) for message in payload))
+            responses = [response for response in responses if response is not None]
+            return responses or None
+        return await self.handle_message(payload)
+
+    async def handle_message(self, message: Any) -> Optional[Dict[str, Any]]:
+        """Answer one JSON-RPC message (None for notifications)."""
+        if not isinstance(message, dict) or message.get("jsonrpc") != "2.0" or not isinstance(message.get("method"), str):
+            return _error(message.get("id") if isinstance(message, dict) else None, INVALID_REQUEST, "Invalid Request")
+        self.requests += 1
+        is_notification = "id" not in message
+        request_id = message.get("id")
+        method = message["method"]
+        params = message.get("params") or {}
+        if not isinstance(params, dict):
+            return None if is_notification else _error(request_id, INVALID_PARAMS, "Invalid params: params must be an object")
+
+        try:
+            if method == "initialize":
+                result = {
+                    "protocolVersion": params.get("protocolVersion", PROTOCOL_VERSION),
+                    "capabilities": {"tools": {}},
+                    "serverInfo": {"name": SERVER_NAME, "version": SERVER_VERSION}
+                }
+            elif method == "ping":
+                result = {}
+            elif method == "tools/list":
+                result = {"tools": [tool_definition(metadata, func) for metadata, func in TOOLS.values()]}
+            elif method == "tools/call":
+                result = await self.call_tool(params.get("name"), params.get("arguments") or {})
+            elif method.startswith("notifications/"):
+                return None
+            else:
+                return None if is_notification else _error(request_id, METHOD_NOT_FOUND, f"Method not found: {method}")
+        except Exception as error:
+            return None if is_notification else _error(request_id, INTERNAL_ERROR, str(error))
+        return None if is_notification else {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    async def call_tool(self, name: Any, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        """tools/call result: the tool's JSON output, or isError content like the TS server's."""
+        if name not in TOOLS:
+            return _tool_error(f"Unknown tool: {name}")
+        if not isinstance(arguments, dict):
+            return _tool_error("arguments must be an object")
+        metadata = TOOLS[name][0]
+        arguments = {key: value for key, value in arguments.items() if key in metadata["parameters"]}
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+        async with self._slots:
+            ok, value = await self.coalescers[name].call(arguments)
+        if not ok:
+            return _tool_error(value)
+        return {"content": [{"type": "text", "text": json.dumps(value, indent=2)}]}
+
+    # HTTP
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Serve HTTP/1.1 requests on one connection until it closes."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, path, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "Bad request line"}, close=True)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length") or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(writer, 400, {"error": "Invalid Content-Length"}, close=True)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "Request body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+
+                status, response = await self.route(method, path.split("?", 1)[0], body)
+                await self._respond(writer, status, response, close)
+                if close:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def route(self, method: str, path: str, body: bytes) -> Tuple[int, Any]:
+        """(status, JSON body) for one HTTP request."""
+        if path == "/health" and method == "GET":
+            return 200, {"status": "ok", "server": SERVER_NAME, "version": SERVER_VERSION}
+        if path != "/mcp":
+            return 404, {"error": "Not found"}
+        if method == "GET":
+            return 405, _error(None, SERVER_ERROR, "Method not allowed. Use POST for MCP requests.")
+        if method != "POST":
+            return 405, _error(None, SERVER_ERROR, "Method not allowed.")
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return 400, _error(None, PARSE_ERROR, "Parse error")
+        response = await self.handle_payload(payload)
+        return (202, None) if response is None else (200, response)
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body: Any, close: bool) -> None:
+        """Write one JSON (or empty) HTTP response."""
+        content = b"" if body is None else json.dumps(body).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + content)
+        await writer.drain()
+
+    async def start(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        """Start listening; returns the asyncio server."""
+        self._server = await asyncio.start_server(self.handle_connection, host, port)
+        return self._server
+
+    async def serve_forever(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> None:
+        """Listen until cancelled."""
+        server = await self.start(host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def close(self) -> None:
+        """Stop listening and shut down the worker pool if this server created it."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._owns_executor:
+            self.executor.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        """Request count and per-tool coalescing counters."""
+        return {
+            "requests": self.requests,
+            "uptime_seconds": round(time.time() - self.started, 1),
+            "tools": {
+                name: {
+                    "calls": coalescer.calls,
+                    "batches": coalescer.batches,
+                    "mean_batch_size": round(coalescer.calls / coalescer.batches, 2) if coalescer.batches else 0.0
+                }
+                for name, coalescer in self.coalescers.items()
+            }
+        }
+
+
+def _error(request_id: Any, code: int, message: str) -> Dict[str, Any]:
+    """JSON-RPC error response."""
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+
+def _tool_error(message: str) -> Dict[str, Any]:
+    """tools/call result reporting a failed call."""
+    return {"content": [{"type": "text", "text": f"Error: {message}"}], "isError": True}
+
+
+# Example usage
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the Python tools over MCP (JSON-RPC over HTTP)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", DEFAULT_PORT)))
+    parser.add_argument("--workers", type=int, default=DEFAULT_MAX_WORKERS, help="worker processes")
+    parser.add_argument("--coalesce-ms", type=float, default=DEFAULT_COALESCE_WINDOW * 1000,
+                        help="window for grouping same-tool calls")
+    args = parser.parse_args()
+
+    async def main() -> None:
+        server = MCPServer(max_workers=args.workers, coalesce_window=args.coalesce_ms / 1000)
+        print(f"NumberSense MCP Python Server listening on port {args.port}")
+        print(f"MCP endpoint: POST http://{args.host}:{args.port}/mcp")
+        print(f"Health check: GET http://{args.host}:{args.port}/health")
+        try:
+            await server.serve_forever(args.host, args.port)
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
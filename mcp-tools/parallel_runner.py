@@ -0,0 +1,166 @@
+"""
+Parallel Batch Runner for Adaptive Maths Tutor
+Shards whole-school analyses and question-bank audits across CPU cores.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Any, Callable, Iterable, Optional, Tuple
+import os
+import time
+
+from student_analyzer import analyze_student_gaps
+from curriculum_validator import validate_question
+from benchmark_checker import compare_to_benchmark
+
+# Items sent to a worker per task; large enough to amortize pickling overhead
+DEFAULT_CHUNK_SIZE = 256
+
+# Pools started per run: chunks lost when a worker dies get one fresh pool
+MAX_POOL_ATTEMPTS = 2
+
+
+def run_parallel(
+    func: Callable[..., Dict[str, Any]],
+    items: Iterable[Any],
+    max_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    unpack: bool = False
+) -> Dict[str, Any]:
+    """
+    Run a pure tool function over many items on a process pool.
+
+    Items are never run in the calling process once a pool is in use. If
+    a worker dies (crash, OOM), every unfinished chunk is resubmitted to a
+    fresh pool once; chunks that fail again, or whose task itself fails
+    (e.g. an unpicklable result), have all their items reported failed.
+
+    Args:
+        func: Module-level function to call per item (must be picklable)
+        items: Inputs, one per call
+        max_workers: Worker processes (default: all cores)
+        chunk_size: Items per worker task
+        unpack: Call func(*item) instead of func(item)
+
+    Returns:
+        Dictionary containing:
+            - results: One result per item in input order (None where the item failed)
+            - errors: List of {index, error} for failed items
+            - stats: Item counts, elapsed time, throughput, failed chunks
+              and pool restarts
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+
+    items = list(items)
+    workers = max_workers or os.cpu_count() or 1
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    chunk_outcomes: List[List[Tuple[bool, Any]]] = [[] for _ in chunks]
+    failed_chunks = 0
+    pool_restarts = 0
+
+    start = time.perf_counter()
+    if workers == 1 or len(chunks) <= 1:
+        chunk_outcomes = [_run_chunk(func, chunk, unpack) for chunk in chunks]
+    else:
+        pending = list(range(len(chunks)))
+        for attempt in range(MAX_POOL_ATTEMPTS):
+            if not pending:
+                break
+            if attempt:
+                pool_restarts += 1
+            lost = []
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [(i, executor.submit(_run_chunk, func, chunks[i], unpack)) for i in pending]
+                for i, future in futures:
+                    try:
+                        chunk_outcomes[i] = future.result()
+                    except BrokenProcessPool:
+                        lost.append(i)
+                    except Exception as e:
+                        chunk_outcomes[i] = _failed_chunk(chunks[i], e)
+                        failed_chunks += 1
+            pending = lost
+        for i in pending:
+            chunk_outcomes[i] = _failed_chunk(chunks[i], BrokenProcessPool("worker process died"))
+            failed_chunks += 1
+    elapsed = time.perf_counter() - start
+    outcomes = [outcome for chunk in chunk_outcomes for outcome in chunk]
+
+    results = []
+    errors = []
+    for index, (ok, value) in enumerate(outcomes):
+        if ok:
+            results.append(value)
+        else:
+            results.append(None)
+            errors.append({"index": index, "error": value})
+
+    return {
+        "results": results,
+        "errors": errors,
+        "stats": {
+            "items": len(items),
+            "failed": len(errors),
+            "workers": workers,
+            "chunk_size": chunk_size,
+            "failed_chunks": failed_chunks,
+            "pool_restarts": pool_restarts,
+            "elapsed_seconds": round(elapsed, 4),
+            "items_per_second": round(len(items) / elapsed, 1) if elapsed > 0 else 0.0
+        }
+    }
+
+
+def _run_chunk(func: Callable[..., Any], chunk: List[Any], unpack: bool) -> List[Tuple[bool, Any]]:
+    """Run func over a chunk, isolating failures to the item that raised."""
+    outcomes = []
+    for item in chunk:
+        try:
+            outcomes.append((True, func(*item) if unpack else func(item)))
+        except Exception as e:
+            outcomes.append((False, f"{type(e).__name__}: {e}"))
+    return outcomes
+
+
+def _failed_chunk(chunk: List[Any], error: BaseException) -> List[Tuple[bool, Any]]:
+    """Outcomes marking every item of a chunk whose worker task failed."""
+    message = f"{type(error).__name__}: {error}"
+    return [(False, message)] * len(chunk)
+
+
+def analyze_students_parallel(students: Iterable[Dict[str, Any]], **options: Any) -> Dict[str, Any]:
+    """Run analyze_student_gaps over a list of student_data dicts."""
+    return run_parallel(analyze_student_gaps, students, **options)
+
+
+def validate_questions_parallel(
+    questions: Iterable[Tuple[Dict[str, Any], str]],
+    **options: Any
+) -> Dict[str, Any]:
+    """Run validate_question over (question, topic) pairs."""
+    return run_parallel(validate_question, questions, unpack=True, **options)
+
+
+def benchmark_questions_parallel(
+    questions: Iterable[Tuple[Dict[str, Any], str]],
+    **options: Any
+) -> Dict[str, Any]:
+    """Run compare_to_benchmark over (question, topic) pairs."""
+    return run_parallel(compare_to_benchmark, questions, unpack=True, **options)
+
+
+# Example usage
+if __name__ == "__main__":
+    questions = [
+        ({"text": f"Emma has {n} stickers. She shares them equally among 4 friends. How many stickers does each friend get?",
+          "answer": n // 4}, "division")
+        for n in range(4, 100_004, 4)
+    ]
+    questions.append(({"text": None}, "division"))  # Fails on its own without sinking the batch
+
+    report = benchmark_questions_parallel(questions, chunk_size=1000)
+    print("Benchmark Audit:")
+    print(f"  Stats: {report['stats']}")
+    print(f"  Errors: {report['errors']}")
+    print(f"  First Score: {report['results'][0]['quality_score']}")
@@ -0,0 +1,105 @@
+"""
+Parsed Question Document for Adaptive Maths Tutor
+Question text analysed once and shared by the validator and benchmark checker.
+"""
+
+from typing import Dict, List, Any, Optional
+import hashlib
+import re
+
+import lexicon
+from lexicon import Lexicon, tokenize
+
+_NUMBER_PATTERN = re.compile(r'\b\d+\b')
+
+
+def source_fingerprint(*paths: str) -> str:
+    """
+    Content hash of the source files a checker's logic lives in, plus this
+    module and the lexicon every check reads through. Cached results keyed
+    on it are dropped whenever the check code changes.
+    """
+    digest = hashlib.sha256()
+    for path in (*paths, __file__, lexicon.__file__):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class QuestionDocument:
+    """
+    Lazily computed features of one question text.
+
+    Each feature is computed on first access and kept, so passing the same
+    document to validate_question and compare_to_benchmark tokenizes and
+    scans the text once. Documents depend only on the text and can be
+    shared between questions with the same wording.
+    """
+
+    __slots__ = ("text", "_tokens", "_words", "_numbers", "_sentence_lengths", "_hits")
+
+    def __init__(self, text: str):
+        self.text = text
+        self._tokens: Optional[List[str]] = None
+        self._words: Optional[List[str]] = None
+        self._numbers: Optional[List[int]] = None
+        self._sentence_lengths: Optional[List[int]] = None
+        # id(lexicon) -> scan result
+        self._hits: Dict[int, Dict[str, List[str]]] = {}
+
+    @classmethod
+    def from_question(cls, question: Dict[str, Any]) -> "QuestionDocument":
+        """Document for a question dict's text."""
+        return cls(question.get("text", ""))
+
+    @property
+    def tokens(self) -> List[str]:
+        """Lowercased words and numbers (lexicon.tokenize)."""
+        if self._tokens is None:
+            self._tokens = tokenize(self.text)
+        return self._tokens
+
+    @property
+    def words(self) -> List[str]:
+        """Whitespace-separated words, punctuation attached."""
+        if self._words is None:
+            self._words = self.text.split()
+        return self._words
+
+    @property
+    def numbers(self) -> List[int]:
+        """Whole numbers in the text, in order."""
+        if self._numbers is None:
+            self._numbers = [int(n) for n in _NUMBER_PATTERN.findall(self.text)]
+        return self._numbers
+
+    @property
+    def sentence_lengths(self) -> List[int]:
+        """Word count of each full-stop-separated sentence."""
+        if self._sentence_lengths is None:
+            self._sentence_lengths = [len(sentence.split()) for sentence in self.text.split('.')]
+        return self._sentence_lengths
+
+    def hits(self, lexicon: Lexicon) -> Dict[str, List[str]]:
+        """lexicon.scan of the text, reusing the shared tokens."""
+        key = id(lexicon)
+        hits = self._hits.get(key)
+        if hits is None:
+            hits = self._hits[key] = lexicon.scan(self.text, self.tokens)
+        return hits
+
+
+# Example usage
+if __name__ == "__main__":
+    from benchmark_checker import compare_to_benchmark
+    from curriculum_validator import validate_question
+
+    question = {
+        "text": "Emma has 24 stickers. She shares them equally among 4 friends. How many stickers does each friend get?",
+        "answer": 6
+    }
+    document = QuestionDocument.from_question(question)
+
+    print("Validation:", validate_question(question, "division", document=document))
+    print("Benchmark:", compare_to_benchmark(question, "division", document=document)["quality_score"])
+    print("Numbers:", document.numbers, "Sentence lengths:", document.sentence_lengths)
@@ -0,0 +1,357 @@
+"""
+Question Generation Pipeline for Adaptive Maths Tutor
+Asyncio generate -> validate/score -> sink pipeline with bounded queues.
+"""
+
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Any, Awaitable, Callable, Iterable, Optional, Tuple, Union
+import asyncio
+import inspect
+import itertools
+import json
+import random
+import time
+
+from benchmark_checker import CHILD_NAMES, compare_to_benchmark
+from curriculum_validator import DEFAULT_YEAR, validate_question
+from duplicate_index import DuplicateIndex
+from question_document import QuestionDocument
+
+# A generator takes a request ({"topic": ..., plus any prompt hints}) and
+# returns one question dict or a list of them
+Generator = Callable[[Dict[str, Any]], Awaitable[Union[Dict[str, Any], List[Dict[str, Any]]]]]
+
+DEFAULT_MAX_CONCURRENT_GENERATIONS = 8
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_CHECK_BATCH_SIZE = 32
+
+_END = object()
+
+# Duplicate-index keys for accepted questions: ("generated", n), unique per
+# process, so they never replace the caller's own entries or earlier runs'
+_GENERATED_KEYS = itertools.count()
+
+
+class StageStats:
+    """Latency samples and error count for one pipeline stage."""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, error count and latency percentiles in milliseconds."""
+        latencies = sorted(self.latencies)
+        if not latencies:
+            return {"count": 0, "errors": self.errors}
+
+        def percentile(p: float) -> float:
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+        return {
+            "count": len(latencies),
+            "errors": self.errors,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(latencies[-1] * 1000, 3)
+        }
+
+
+class MonitoredQueue(asyncio.Queue):
+    """Bounded queue that samples its depth on every put."""
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self.max_depth = 0
+        self._depth_total = 0
+        self._samples = 0
+
+    def _put(self, item: Any) -> None:
+        super()._put(item)
+        depth = self.qsize()
+        self.max_depth = max(self.max_depth, depth)
+        self._depth_total += depth
+        self._samples += 1
+
+    def depth_stats(self) -> Dict[str, Any]:
+        """Capacity plus max and mean depth seen by producers."""
+        return {
+            "capacity": self.maxsize,
+            "max_depth": self.max_depth,
+            "mean_depth": round(self._depth_total / self._samples, 2) if self._samples else 0.0
+        }
+
+
+def check_questions(items: List[Tuple[Dict[str, Any], str]], year: int = DEFAULT_YEAR) -> List[Dict[str, Any]]:
+    """
+    Validate and benchmark a batch of (question, topic) pairs, sharing one
+    QuestionDocument per question. Runs inside the worker pool.
+    """
+    results = []
+    for question, topic in items:
+        document = QuestionDocument.from_question(question)
+        validation = validate_question(question, topic, document=document, year=year)
+        benchmark = compare_to_benchmark(question, topic, document=document)
+        results.append({
+            "question": question,
+            "topic": topic,
+            "validation": validation,
+            "benchmark": benchmark,
+            "accepted": validation["is_valid"] and benchmark["passes_benchmark"]
+        })
+    return results
+
+
+async def run_pipeline(
+    requests: Iterable[Dict[str, Any]],
+    generate: Generator,
+    sink: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    max_concurrent_generations: int = DEFAULT_MAX_CONCURRENT_GENERATIONS,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    check_workers: int = 2,
+    check_batch_size: int = DEFAULT_CHECK_BATCH_SIZE,
+    executor: Optional[Executor] = None,
+    duplicate_index: Optional[DuplicateIndex] = None,
+    year: int = DEFAULT_YEAR
+) -> Dict[str, Any]:
+    """
+    Generate candidate questions, check them off the event loop and sink the results.
+
+    Generation runs up to max_concurrent_generations requests at once and
+    blocks on a full queue, so slow checking throttles generation instead
+    of piling up candidates. check_workers tasks each take up to
+    check_batch_size candidates at a time and run check_questions on the
+    executor (default: a process pool). If duplicate_index is given,
+    near-duplicates of already indexed questions are dropped before
+    checking, and accepted questions are added to it under
+    ("generated", n) keys, which cannot collide with the caller's keys.
+
+    Args:
+        requests: One dict per generate() call; must include "topic"
+        generate: Async generator callable (e.g. StubGenerator, AnthropicGenerator)
+        sink: Called (or awaited) with each checked result; results are
+            collected and returned when omitted
+        max_concurrent_generations: Limit on in-flight generate() calls
+        queue_size: Capacity of each inter-stage queue
+        check_workers: Concurrent check batches
+        check_batch_size: Candidates per check batch
+        executor: Worker pool for checking
+        duplicate_index: Optional near-duplicate filter
+        year: Year group whose curriculum applies
+
+    Returns:
+        Dictionary containing:
+            - results: Checked results (only when no sink was given)
+            - counts: Requests, generated, duplicates, checked and accepted
+            - stages: Latency percentiles and errors per stage
+            - queues: Depth statistics per queue
+            - elapsed_seconds / questions_per_second
+    """
+    loop = asyncio.get_running_loop()
+    generated: MonitoredQueue = MonitoredQueue(queue_size)
+    checked: MonitoredQueue = MonitoredQueue(queue_size)
+    stages = {"generate": StageStats(), "check": StageStats(), "sink": StageStats()}
+    counts = {"requests": 0, "generated": 0, "duplicates": 0, "checked": 0, "accepted": 0}
+    collected: List[Dict[str, Any]] = []
+    limit = asyncio.Semaphore(max_concurrent_generations)
+    owns_executor = executor is None
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers=check_workers)
+
+    async def generate_one(request: Dict[str, Any]) -> None:
+        try:
+            start = time.perf_counter()
+            try:
+                output = await generate(request)
+            except Exception:
+                stages["generate"].errors += 1
+                return
+            stages["generate"].latencies.append(time.perf_counter() - start)
+            for question in output if isinstance(output, list) else [output]:
+                counts["generated"] += 1
+                if duplicate_index is not None and duplicate_index.find_duplicate(question) is not None:
+                    counts["duplicates"] += 1
+                    continue
+                await generated.put((question, request["topic"]))
+        finally:
+            limit.release()
+
+    async def produce() -> None:
+        tasks = []
+        for request in requests:
+            counts["requests"] += 1
+            await limit.acquire()
+            tasks.append(asyncio.ensure_future(generate_one(request)))
+        await asyncio.gather(*tasks)
+        for _ in range(check_workers):
+            await generated.put(_END)
+
+    async def check() -> None:
+        done = False
+        while not done:
+            batch = []
+            item = await generated.get()
+            while item is not _END:
+                batch.append(item)
+                if len(batch) >= check_batch_size or generated.empty():
+                    break
+                item = generated.get_nowait()
+            done = item is _END
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(executor, check_questions, batch, year)
+            except Exception:
+                stages["check"].errors += len(batch)
+                continue
+            # Per-question latency: the batch's wall time shared across its questions
+            elapsed = (time.perf_counter() - start) / len(batch)
+            stages["check"].latencies.extend([elapsed] * len(batch))
+            for result in results:
+                await checked.put(result)
+        await checked.put(_END)
+
+    async def drain() -> None:
+        remaining = check_workers
+        while remaining:
+            result = await checked.get()
+            if result is _END:
+                remaining -= 1
+                continue
+            counts["checked"] += 1
+            if result["accepted"]:
+                counts["accepted"] += 1
+                if duplicate_index is not None:
+                    duplicate_index.add(("generated", next(_GENERATED_KEYS)), result["question"])
+            start = time.perf_counter()
+            try:
+                if sink is None:
+                    collected.append(result)
+                else:
+                    outcome = sink(result)
+                    if inspect.isawaitable(outcome):
+                        await outcome
+            except Exception:
+                stages["sink"].errors += 1
+                continue
+            stages["sink"].latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(produce(), *(check() for _ in range(check_workers)), drain())
+    finally:
+        if owns_executor:
+            executor.shutdown()
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "counts": counts,
+        "stages": {name: stats.summary() for name, stats in stages.items()},
+        "queues": {"generated": generated.depth_stats(), "checked": checked.depth_stats()},
+        "elapsed_seconds": round(elapsed, 4),
+        "questions_per_second": round(counts["checked"] / elapsed, 1) if elapsed > 0 else 0.0
+    }
+    if sink is None:
+        report["results"] = collected
+    return report
+
+
+class StubGenerator:
+    """
+    Local stand-in for an LLM: returns templated word problems after a
+    simulated network delay. Deterministic for a given seed.
+    """
+
+    TEMPLATES = [
+        "{name} has {a} {things}. {pronoun} shares them equally among {b} friends. How many {things} does each friend get?",
+        "{name} buys {b} bags with {a} {things} in each bag. How many {things} does {name} have altogether?",
+        "{name} had {a} {things} and gave away {b}. How many {things} are left?",
+        "Calculate {a} divided by {b}."
+    ]
+    THINGS = ["stickers", "apples", "marbles", "sweets", "pencils", "cookies"]
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.02, per_request: int = 4, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.per_request = per_request
+        self._random = random.Random(seed)
+
+    async def __call__(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        await asyncio.sleep(max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter)))
+        questions = []
+        for _ in range(self.per_request):
+            b = self._random.choice([2, 3, 4, 5, 8, 10])
+            a = b * self._random.randint(2, 12)
+            questions.append({
+                "text": self._random.choice(self.TEMPLATES).format(
+                    name=self._random.choice(CHILD_NAMES).capitalize(),
+                    pronoun=self._random.choice(["She", "He"]),
+                    things=self._random.choice(self.THINGS),
+                    a=a, b=b
+                ),
+                "answer": a // b,
+                "topic": request["topic"]
+            })
+        return questions
+
+
+class AnthropicGenerator:
+    """
+    Generator backed by the Anthropic Messages API.
+
+    Asks for a JSON array of {"text", "answer"} questions. Needs the
+    anthropic package and ANTHROPIC_API_KEY (python-dotenv's .env is read
+    if installed).
+    """
+
+    def __init__(self, model: str, per_request: int = 4, max_tokens: int = 1024):
+        import anthropic
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except ImportError:
+            pass
+        self.client = anthropic.AsyncAnthropic()
+        self.model = model
+        self.per_request = per_request
+        self.max_tokens = max_tokens
+
+    async def __call__(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        prompt = (
+            f"Write {self.per_request} UK Year 3 maths word problems on the topic "
+            f"'{request['topic']}'{' (' + request['hint'] + ')' if request.get('hint') else ''}. "
+            'Reply with only a JSON array of objects with keys "text" and "answer".'
+        )
+        message = await self.client.messages.create(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            messages=[{"role": "user", "content": prompt}]
+        )
+        text = "".join(block.text for block in message.content if getattr(block, "type", "") == "text")
+        questions = json.loads(text[text.index("["):text.rindex("]") + 1])
+        return [
+            {"text": q.get("text", ""), "answer": q.get("answer"), "topic": request["topic"]}
+            for q in questions if isinstance(q, dict)
+        ]
+
+
+def generate_and_check(requests: Iterable[Dict[str, Any]], generate: Generator, **options: Any) -> Dict[str, Any]:
+    """Synchronous wrapper around run_pipeline."""
+    return asyncio.run(run_pipeline(requests, generate, **options))
+
+
+# Example usage
+if __name__ == "__main__":
+    topics = ["division", "multiplication", "subtraction"]
+    report = generate_and_check(
+        [{"topic": topics[i % len(topics)]} for i in range(200)],
+        StubGenerator(latency=0.05, per_request=4),
+        max_concurrent_generations=16,
+        duplicate_index=DuplicateIndex(threshold=0.95, mask_names=False, mask_numbers=False)
+    )
+    results = report.pop("results")
+    print("Pipeline Report:")
+    print(json.dumps(report, indent=2))
+    print(f"First accepted: {next((r['question']['text'] for r in results if r['accepted']), None)}")
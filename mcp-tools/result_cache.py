@@ -0,0 +1,233 @@
+"""
+Persistent Result Cache for Adaptive Maths Tutor
+SQLite-backed cache in front of validate_question and compare_to_benchmark.
+"""
+
+from typing import Dict, Any, Callable
+import hashlib
+import json
+import re
+import sqlite3
+import time
+
+import benchmark_checker
+import curriculum_validator
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+# Writes held in the open transaction before committing
+COMMIT_EVERY = 100
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def rules_version(tables: Dict[str, Any]) -> str:
+    """Stable hash of a module's RULE_TABLES; changes whenever any table or the check code does."""
+    encoded = json.dumps(tables, sort_keys=True, separators=(",", ":"), default=sorted)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+
+
+def tool_rules_versions() -> Dict[str, str]:
+    """Current rules_version of each tool, including the year-group curriculum files."""
+    return {
+        "validate_question": rules_version({
+            **curriculum_validator.RULE_TABLES,
+            "curricula_files": curriculum_validator.CURRICULA.source_fingerprint()
+        }),
+        "compare_to_benchmark": rules_version(benchmark_checker.RULE_TABLES)
+    }
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and collapse whitespace, so trivial variants share a cache entry."""
+    return _WHITESPACE_PATTERN.sub(" ", (text or "").lower()).strip()
+
+
+class ResultCache:
+    """
+    On-disk cache of validation and benchmark results.
+
+    Entries are keyed by normalized question text, topic and (for
+    validation) the other question fields the checks read. Each tool's
+    entries carry the rules_version they were computed under, which
+    covers the check code as well as the tables; entries from other
+    versions are purged when the cache is opened. On a miss the tool runs
+    on the caller's question, and variants that normalize to the same text
+    then share that result. Least recently used entries are evicted once
+    max_entries is exceeded.
+    """
+
+    def __init__(self, path: str, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.path = path
+        self.max_entries = max_entries
+        self.tools: Dict[str, Callable[[Dict[str, Any], str], Dict[str, Any]]] = {
+            "validate_question": curriculum_validator.validate_question,
+            "compare_to_benchmark": benchmark_checker.compare_to_benchmark
+        }
+        self.versions = tool_rules_versions()
+        self.hits = {tool: 0 for tool in self.tools}
+        self.misses = {tool: 0 for tool in self.tools}
+        self.evictions = 0
+        self.invalidated = 0
+        self._pending_writes = 0
+
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            " tool TEXT NOT NULL, key TEXT NOT NULL, rules_version TEXT NOT NULL,"
+            " result TEXT NOT NULL, last_used REAL NOT NULL,"
+            " PRIMARY KEY (tool, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        for tool, version in self.versions.items():
+            cursor = self._conn.execute(
+                "DELETE FROM results WHERE tool = ? AND rules_version != ?", (tool, version)
+            )
+            self.invalidated += cursor.rowcount
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def validate_question(
+        self,
+        question: Dict[str, Any],
+        topic: str,
+        year: int = curriculum_validator.DEFAULT_YEAR
+    ) -> Dict[str, Any]:
+        """validate_question, served from the cache when seen before under the current rules."""
+        return self._lookup("validate_question", question, topic, {
+            "answer": question.get("answer"),
+            "operation": question.get("operation"),
+            "numbers_used": question.get("numbers_used")
+        }, year=year)
+
+    def compare_to_benchmark(self, generated_question: Dict[str, Any], topic: str) -> Dict[str, Any]:
+        """compare_to_benchmark, served from the cache when seen before under the current rules."""
+        return self._lookup("compare_to_benchmark", generated_question, topic, {})
+
+    def _lookup(
+        self,
+        tool: str,
+        question: Dict[str, Any],
+        topic: str,
+        fields: Dict[str, Any],
+        **options: Any
+    ) -> Dict[str, Any]:
+        """Return the cached result for a question or compute and store it."""
+        text = normalize_text(question.get("text", ""))
+        key = hashlib.blake2b(
+            json.dumps([text, topic, fields, options], sort_keys=True, default=str).encode("utf-8"),
+            digest_size=16
+        ).hexdigest()
+        now = time.time()
+
+        row = self._conn.execute(
+            "SELECT result FROM results WHERE tool = ? AND key = ?", (tool, key)
+        ).fetchone()
+        if row is not None:
+            self.hits[tool] += 1
+            self._conn.execute(
+                "UPDATE results SET last_used = ? WHERE tool = ? AND key = ?", (now, tool, key)
+            )
+            self._wrote()
+            return json.loads(row[0])
+
+        self.misses[tool] += 1
+        result = self.tools[tool](question, topic, **options)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+            (tool, key, self.versions[tool], json.dumps(result), now)
+        )
+        self._entries += 1
+        if self._entries > self.max_entries:
+            self._evict()
+        self._wrote()
+        return result
+
+    def _evict(self) -> None:
+        """Drop least recently used entries down to 90% of max_entries."""
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        excess = self._entries - self.max_entries
+        if excess <= 0:
+            return
+        excess += self.max_entries // 10
+        cursor = self._conn.execute(
+            "DELETE FROM results WHERE rowid IN "
+            "(SELECT rowid FROM results ORDER BY last_used LIMIT ?)", (excess,)
+        )
+        self.evictions += cursor.rowcount
+        self._entries -= cursor.rowcount
+
+    def _wrote(self) -> None:
+        """Commit once enough writes have accumulated."""
+        self._pending_writes += 1
+        if self._pending_writes >= COMMIT_EVERY:
+            self.flush()
+
+    def flush(self) -> None:
+        """Commit pending writes to disk."""
+        self._conn.commit()
+        self._pending_writes = 0
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        self._conn.execute("DELETE FROM results")
+        self.flush()
+        self._entries = 0
+
+    def close(self) -> None:
+        """Commit and close the database."""
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._entries
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per tool and current size."""
+        per_tool = {}
+        for tool in self.tools:
+            lookups = self.hits[tool] + self.misses[tool]
+            per_tool[tool] = {
+                "hits": self.hits[tool],
+                "misses": self.misses[tool],
+                "hit_rate": round(self.hits[tool] / lookups, 4) if lookups else 0.0,
+                "rules_version": self.versions[tool]
+            }
+        hits = sum(self.hits.values())
+        lookups = hits + sum(self.misses.values())
+        return {
+            "entries": self._entries,
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "invalidated": self.invalidated,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "tools": per_tool
+        }
+
+
+# Example usage
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    path = os.path.join(tempfile.gettempdir(), "question_results.sqlite")
+    question = {
+        "text": "Emma has 24 stickers. She shares them equally among 4 friends. How many stickers does each friend get?",
+        "answer": 6
+    }
+    variant = dict(question, text="  emma has 24 stickers.  She shares them equally among 4 friends. "
+                                  "How many stickers does each friend get?")
+
+    with ResultCache(path, max_entries=1000) as cache:
+        for q in (question, variant, question):
+            cache.validate_question(q, "division")
+            cache.compare_to_benchmark(q, "division")
+        print("Cache Stats:", json.dumps(cache.stats(), indent=2))
@@ -0,0 +1,182 @@
+"""
+Compact Result Types for Adaptive Maths Tutor
+Slotted result objects and interned labels for large batch runs.
+"""
+
+from enum import Enum
+from typing import Dict, List, Any, Sequence, Tuple
+import sys
+import weakref
+
+
+class Difficulty(str, Enum):
+    FOUNDATION = "foundation"
+    CORE = "core"
+    CHALLENGE = "challenge"
+
+
+class Priority(str, Enum):
+    HIGH = "high"
+    MEDIUM = "medium"
+
+
+class Reason(str, Enum):
+    RECENT_DECLINE = "recent_decline"
+    PREREQUISITE_GAP = "prerequisite_gap"
+    DIAGNOSTIC_GAP = "diagnostic_gap"
+
+
+class Approach(str, Enum):
+    REVIEW_FUNDAMENTALS = "review_fundamentals"
+    BUILD_FOUNDATION = "build_foundation"
+    TARGETED_PRACTICE = "targeted_practice"
+
+
+# Each focus-area reason always comes with the same suggested approach
+REASON_APPROACHES = {
+    Reason.RECENT_DECLINE: Approach.REVIEW_FUNDAMENTALS,
+    Reason.PREREQUISITE_GAP: Approach.BUILD_FOUNDATION,
+    Reason.DIAGNOSTIC_GAP: Approach.TARGETED_PRACTICE
+}
+
+
+def intern_topic(topic: str) -> str:
+    """
+    Canonical copy of a topic name. Topics parsed from each student's JSON
+    are separate string objects; interning makes every result share one.
+    """
+    return sys.intern(topic)
+
+
+class FocusArea:
+    """
+    One focus-area entry. Instances are shared: get() returns the same
+    object for every (topic, priority, reason), so a cohort's results hold
+    references rather than copies. They are read-only, and the registry
+    holds them weakly, so topics no live result uses are not kept around
+    by long-running processes.
+    """
+
+    __slots__ = ("topic", "priority", "reason", "suggested_approach", "_fields", "__weakref__")
+
+    _instances: "weakref.WeakValueDictionary[Tuple[str, Priority, Reason], FocusArea]" = weakref.WeakValueDictionary()
+
+    def __init__(self, topic: str, priority: Priority, reason: Reason):
+        approach = REASON_APPROACHES[reason]
+        for name, value in (
+            ("topic", topic),
+            ("priority", priority),
+            ("reason", reason),
+            ("suggested_approach", approach),
+            ("_fields", {
+                "topic": topic,
+                "priority": priority.value,
+                "reason": reason.value,
+                "suggested_approach": approach.value
+            })
+        ):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("FocusArea instances are shared and read-only")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("FocusArea instances are shared and read-only")
+
+    @classmethod
+    def get(cls, topic: str, priority: Priority, reason: Reason) -> "FocusArea":
+        """Shared instance for a (topic, priority, reason)."""
+        key = (topic, priority, reason)
+        area = cls._instances.get(key)
+        if area is None:
+            area = cls(intern_topic(topic), priority, reason)
+            cls._instances[key] = area
+        return area
+
+    def __reduce__(self) -> Tuple[Any, Tuple[str, Priority, Reason]]:
+        # Unpickle through get(), so results sent between processes share instances too
+        return FocusArea.get, (self.topic, self.priority, self.reason)
+
+    def to_dict(self) -> Dict[str, str]:
+        return self._fields.copy()
+
+    def __repr__(self) -> str:
+        return f"FocusArea({self.topic!r}, {self.priority.value}, {self.reason.value})"
+
+
+class GapAnalysis:
+    """analyze_student_gaps result."""
+
+    __slots__ = ("weak_topics", "recommended_difficulty", "focus_areas")
+
+    def __init__(self, weak_topics: Sequence[str], recommended_difficulty: Difficulty, focus_areas: Sequence[FocusArea]):
+        self.weak_topics = tuple(intern_topic(topic) for topic in weak_topics)
+        self.recommended_difficulty = recommended_difficulty
+        self.focus_areas = tuple(focus_areas)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "weak_topics": list(self.weak_topics),
+            "recommended_difficulty": self.recommended_difficulty.value,
+            "focus_areas": [area.to_dict() for area in self.focus_areas]
+        }
+
+
+class ValidationResult:
+    """validate_question result."""
+
+    __slots__ = ("is_valid", "issues", "suggestions")
+
+    def __init__(self, is_valid: bool, issues: List[str], suggestions: List[str]):
+        self.is_valid = is_valid
+        self.issues = issues
+        self.suggestions = suggestions
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "is_valid": self.is_valid,
+            "issues": list(self.issues),
+            "suggestions": list(self.suggestions)
+        }
+
+
+class BenchmarkResult:
+    """
+    compare_to_benchmark result. Most improvement messages are string
+    literals in the checker, so the list mostly holds references to
+    shared strings.
+    """
+
+    __slots__ = ("quality_score", "passes_benchmark", "improvements_needed",
+                 "real_world_context", "clear_language", "age_appropriate", "concrete_objects")
+
+    def __init__(
+        self,
+        quality_score: float,
+        passes_benchmark: bool,
+        improvements_needed: List[str],
+        real_world_context: float,
+        clear_language: float,
+        age_appropriate: float,
+        concrete_objects: float
+    ):
+        self.quality_score = quality_score
+        self.passes_benchmark = passes_benchmark
+        self.improvements_needed = improvements_needed
+        self.real_world_context = real_world_context
+        self.clear_language = clear_language
+        self.age_appropriate = age_appropriate
+        self.concrete_objects = concrete_objects
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "quality_score": self.quality_score,
+            "passes_benchmark": self.passes_benchmark,
+            "improvements_needed": list(self.improvements_needed),
+            "criterion_scores": {
+                "real_world_context": self.real_world_context,
+                "clear_language": self.clear_language,
+                "age_appropriate": self.age_appropriate,
+                "concrete_objects": self.concrete_objects
+            }
+        }
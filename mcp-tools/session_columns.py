@@ -0,0 +1,137 @@
+"""
+Columnar Session Storage for Adaptive Maths Tutor
+Array-backed replacement for lists of recent_sessions dicts.
+"""
+
+from array import array
+from typing import Dict, List, Any, Iterable, Iterator, Tuple
+import sys
+
+import numpy as np
+
+
+class TopicTable:
+    """Interns topic names to small integer IDs shared across students."""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, name: str) -> int:
+        """Return the ID for a topic name, assigning one on first use."""
+        topic_id = self.ids.get(name)
+        if topic_id is None:
+            topic_id = len(self.names)
+            if topic_id > 0xFFFF:
+                raise ValueError("Topic table is full (65536 topics)")
+            name = sys.intern(name)
+            self.names.append(name)
+            self.ids[name] = topic_id
+        return topic_id
+
+    def name(self, topic_id: int) -> str:
+        """Return the topic name for an ID."""
+        return self.names[topic_id]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+# Shared table so topic IDs line up across every student's columns
+TOPIC_TABLE = TopicTable()
+
+
+class SessionColumns:
+    """
+    recent_sessions stored as parallel typed arrays.
+
+    Per session: questions_correct, questions_total and an offset into the
+    topic columns. Per topic entry: an interned topic ID (uint16) and a score.
+    That is roughly 24 bytes per session plus 10 per topic score, against
+    several hundred for the equivalent nested dicts.
+    """
+
+    __slots__ = ("topics", "correct", "total", "topic_offsets", "topic_ids", "topic_scores")
+
+    def __init__(self, topics: TopicTable = TOPIC_TABLE):
+        self.topics = topics
+        self.correct = array("d")
+        self.total = array("d")
+        self.topic_offsets = array("q", [0])
+        self.topic_ids = array("H")
+        self.topic_scores = array("d")
+
+    @classmethod
+    def from_dicts(cls, sessions: Iterable[Dict[str, Any]], topics: TopicTable = TOPIC_TABLE) -> "SessionColumns":
+        """Build columns from the existing list-of-dicts session format."""
+        columns = cls(topics)
+        for session in sessions:
+            columns.append(session)
+        return columns
+
+    def append(self, session: Dict[str, Any]) -> None:
+        """Append one session dict, applying the analyzer's defaults."""
+        self.append_record(
+            session.get("questions_correct", 0),
+            session.get("questions_total", 1),
+            session.get("topics_covered", {}).items()
+        )
+
+    def append_record(self, correct: float, total: float, topic_scores: Iterable[Tuple[str, float]]) -> None:
+        """Append one session from raw values."""
+        self.correct.append(correct)
+        self.total.append(total)
+        for topic, score in topic_scores:
+            self.topic_ids.append(self.topics.intern(topic))
+            self.topic_scores.append(score)
+        self.topic_offsets.append(len(self.topic_ids))
+
+    def __len__(self) -> int:
+        return len(self.correct)
+
+    def __bool__(self) -> bool:
+        return len(self.correct) > 0
+
+    def records(self) -> Iterator[Tuple[float, float, List[Tuple[str, float]]]]:
+        """Yield (correct, total, [(topic, score), ...]) per session without building dicts."""
+        names = self.topics.names
+        offsets = self.topic_offsets
+        for i in range(len(self.correct)):
+            start, end = offsets[i], offsets[i + 1]
+            yield self.correct[i], self.total[i], [
+                (names[self.topic_ids[j]], self.topic_scores[j]) for j in range(start, end)
+            ]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield sessions in the dict format, for code that expects it."""
+        for correct, total, topic_scores in self.records():
+            yield {
+                "questions_correct": correct,
+                "questions_total": total,
+                "topics_covered": dict(topic_scores)
+            }
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        """Convert back to the list-of-dicts session format."""
+        return list(self)
+
+    def as_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Zero-copy NumPy views of the columns.
+
+        The views pin the underlying buffers, so drop them before appending.
+        """
+        return {
+            "questions_correct": np.frombuffer(self.correct, dtype=np.float64),
+            "questions_total": np.frombuffer(self.total, dtype=np.float64),
+            "topic_offsets": np.frombuffer(self.topic_offsets, dtype=np.int64),
+            "topic_ids": np.frombuffer(self.topic_ids, dtype=np.uint16),
+            "topic_scores": np.frombuffer(self.topic_scores, dtype=np.float64)
+        }
+
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers."""
+        return sum(
+            len(column) * column.itemsize
+            for column in (self.correct, self.total, self.topic_offsets, self.topic_ids, self.topic_scores)
+        )
@@ -0,0 +1,161 @@
+"""
+Recent-Session Index for Adaptive Maths Tutor
+Time-ordered per-student and per-(student, topic) session lookups.
+"""
+
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+import bisect
+import itertools
+
+from session_ingest import session_from_row, session_timestamp
+
+
+class _TimeSeries:
+    """Sessions sorted by (timestamp, insertion sequence)."""
+
+    __slots__ = ("keys", "sessions")
+
+    def __init__(self):
+        self.keys: List[Tuple[int, int]] = []
+        self.sessions: List[Dict[str, Any]] = []
+
+    def insert(self, key: Tuple[int, int], session: Dict[str, Any]) -> None:
+        """Add a session, appending directly when it is the newest."""
+        if not self.keys or key > self.keys[-1]:
+            self.keys.append(key)
+            self.sessions.append(session)
+        else:
+            i = bisect.bisect_left(self.keys, key)
+            self.keys.insert(i, key)
+            self.sessions.insert(i, session)
+
+    def window(self, start: Optional[int], end: Optional[int]) -> List[Dict[str, Any]]:
+        """Sessions with start <= timestamp < end (either bound optional)."""
+        lo = 0 if start is None else bisect.bisect_left(self.keys, (start,))
+        hi = len(self.keys) if end is None else bisect.bisect_left(self.keys, (end,))
+        return self.sessions[lo:hi]
+
+    def last(self, n: int, before: Optional[int]) -> List[Dict[str, Any]]:
+        """The n latest sessions with timestamp < before (all time if None)."""
+        hi = len(self.keys) if before is None else bisect.bisect_left(self.keys, (before,))
+        return self.sessions[max(hi - n, 0):hi]
+
+
+class SessionIndex:
+    """
+    In-memory index of session history keyed by student and by (student, topic).
+
+    Each key holds its sessions sorted by timestamp (ties keep insertion
+    order), so window and last-N queries are a binary search plus a slice.
+    Sessions may be added in any order; in-order arrivals are appended.
+    A session is indexed under its student and under every topic in its
+    topics_covered, sharing one dict.
+    """
+
+    def __init__(self):
+        self._students: Dict[str, _TimeSeries] = {}
+        self._topics: Dict[str, Dict[str, _TimeSeries]] = {}
+        self._sequence = itertools.count()
+
+    def add_session(self, student: str, timestamp: int, session: Dict[str, Any]) -> None:
+        """Index one session dict (analyzer shape) taken at timestamp (Unix ms)."""
+        key = (timestamp, next(self._sequence))
+        series = self._students.get(student)
+        if series is None:
+            series = self._students[student] = _TimeSeries()
+        series.insert(key, session)
+        by_topic = self._topics.setdefault(student, {})
+        for topic in session.get("topics_covered") or {}:
+            series = by_topic.get(topic)
+            if series is None:
+                series = by_topic[topic] = _TimeSeries()
+            series.insert(key, session)
+
+    def add_row(self, row: Dict[str, Any]) -> None:
+        """Index a practice_sessions row, timed by started_at (or completed_at / session_date)."""
+        self.add_session(str(row["student_id"]), session_timestamp(row), session_from_row(row))
+
+    def _series(self, student: str, topic: Optional[str]) -> Optional[_TimeSeries]:
+        """The student's series, or the (student, topic) one when topic is given."""
+        if topic is None:
+            return self._students.get(student)
+        return self._topics.get(student, {}).get(topic)
+
+    def window(
+        self,
+        student: str,
+        topic: Optional[str] = None,
+        start: Optional[int] = None,
+        end: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """A student's sessions (touching topic, if given) with start <= timestamp < end, oldest first."""
+        series = self._series(student, topic)
+        return series.window(start, end) if series is not None else []
+
+    def last_n(
+        self,
+        student: str,
+        n: int,
+        topic: Optional[str] = None,
+        before: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """A student's n latest sessions (touching topic, if given) before a time, oldest first."""
+        if n <= 0:
+            return []
+        series = self._series(student, topic)
+        return series.last(n, before) if series is not None else []
+
+    def student_data(
+        self,
+        student: str,
+        diagnostic_scores: Optional[Dict[str, float]] = None,
+        n: Optional[int] = None,
+        topic: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """analyze_student_gaps input with the last n sessions (all if None) as recent_sessions."""
+        sessions = self.window(student, topic) if n is None else self.last_n(student, n, topic)
+        return {"diagnostic_scores": diagnostic_scores or {}, "recent_sessions": sessions}
+
+    def topics(self, student: str) -> List[str]:
+        """Topics the student has sessions for."""
+        return sorted(self._topics.get(student, {}))
+
+    def __len__(self) -> int:
+        return sum(len(series.keys) for series in self._students.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Session, student and (student, topic) key counts."""
+        return {
+            "sessions": len(self),
+            "students": len(self._students),
+            "student_topics": sum(len(by_topic) for by_topic in self._topics.values())
+        }
+
+
+def build_index(rows: Iterable[Dict[str, Any]]) -> SessionIndex:
+    """Index practice_sessions rows, e.g. a read_export() stream."""
+    index = SessionIndex()
+    for row in rows:
+        index.add_row(row)
+    return index
+
+
+# Example usage
+if __name__ == "__main__":
+    from student_analyzer import analyze_student_gaps
+
+    index = build_index(
+        {
+            "student_id": "student-1",
+            "started_at": f"2026-01-{day:02d}T09:00:00+00:00",
+            "warmup_questions": [
+                {"topic": "division" if day % 2 else "fractions", "correct": day > 4},
+                {"topic": "division", "correct": True}
+            ]
+        }
+        # Rows arrive out of order
+        for day in (5, 1, 7, 3, 2, 6, 4)
+    )
+    print("Last 3 division sessions:", index.last_n("student-1", 3, topic="division"))
+    print("Index Stats:", index.stats())
+    print(analyze_student_gaps(index.student_data("student-1", {"division": 55}, n=5)))
@@ -0,0 +1,326 @@
+"""
+Streaming Session Ingestion for Adaptive Maths Tutor
+Feeds practice_sessions / diagnostics exports through the student gap analyzer
+one student at a time, without loading the whole export into memory.
+"""
+
+from datetime import date, datetime
+from typing import Dict, List, Any, Iterable, Iterator, Optional, Tuple, TextIO, Union
+import csv
+import gzip
+import heapq
+import itertools
+import json
+import os
+import sys
+import tempfile
+
+from student_analyzer import analyze_student_gaps, SessionTrendTracker
+
+# Export columns stored as JSON (CSV exports carry them as JSON strings)
+JSON_COLUMNS = {
+    "warmup_questions", "stretch_questions", "confidence_scores",
+    "gaps_identified", "strengths", "topics_covered", "diagnostic_scores"
+}
+
+# Rows held in memory per chunk when sorting an unsorted export
+DEFAULT_SORT_CHUNK_SIZE = 100_000
+
+
+def read_export(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream rows from a JSONL or CSV export (optionally gzipped), one at a time.
+
+    JSON columns in CSV exports are decoded; empty CSV cells become None.
+    """
+    is_gzip = path.endswith(".gz")
+    base = path[:-3] if is_gzip else path
+    opener = gzip.open if is_gzip else open
+
+    with opener(path, "rt", encoding="utf-8", newline="") as f:
+        if base.endswith(".csv"):
+            for row in csv.DictReader(f):
+                yield _decode_csv_row(row)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+
+def _decode_csv_row(row: Dict[str, str]) -> Dict[str, Any]:
+    """Turn CSV strings back into the values a JSON export would carry."""
+    decoded = {}
+    for key, value in row.items():
+        if value == "":
+            decoded[key] = None
+        elif key in JSON_COLUMNS:
+            decoded[key] = json.loads(value)
+        else:
+            decoded[key] = value
+    return decoded
+
+
+def session_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a practice_sessions row into the session shape the analyzer expects.
+
+    Rows that already carry questions_correct / questions_total are passed
+    through. Otherwise the warmup and stretch question lists are tallied:
+    each item should carry a topic and a correct / is_correct flag.
+    """
+    if "questions_total" in row or "questions_correct" in row:
+        return {
+            "questions_correct": as_number(row.get("questions_correct"), 0),
+            "questions_total": as_number(row.get("questions_total"), 1),
+            "topics_covered": row.get("topics_covered") or {}
+        }
+
+    correct, total, topic_counts = question_tallies(row)
+    return {
+        "questions_correct": correct,
+        "questions_total": total,
+        "topics_covered": {
+            topic: hits / attempts * 100 for topic, (hits, attempts) in topic_counts.items()
+        }
+    }
+
+
+def question_tallies(row: Dict[str, Any]) -> Tuple[int, float, Dict[str, List[int]]]:
+    """
+    Tally a practice_sessions row's warmup and stretch questions.
+
+    Returns (correct, total, {topic: [correct, attempted]}). Rows with no
+    question items fall back to total_attempts (or 1) for the total.
+    """
+    correct = 0
+    total = 0
+    topic_counts: Dict[str, List[int]] = {}
+
+    for item in itertools.chain(row.get("warmup_questions") or [], row.get("stretch_questions") or []):
+        if not isinstance(item, dict):
+            continue
+        is_correct = bool(item.get("correct", item.get("is_correct", False)))
+        total += 1
+        correct += is_correct
+        topic = item.get("topic")
+        if topic:
+            counts = topic_counts.setdefault(topic, [0, 0])
+            counts[0] += is_correct
+            counts[1] += 1
+
+    if total == 0:
+        total = as_number(row.get("total_attempts"), 0) or 1
+    return correct, total, topic_counts
+
+
+def diagnostic_scores_from_row(row: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Extract topic scores (0-100) from a diagnostics row.
+
+    Uses a diagnostic_scores object if present, otherwise the
+    {topic, confidence} entries in gaps_identified and strengths.
+    Confidences on a 0-1 scale are rescaled to 0-100.
+    """
+    if row.get("diagnostic_scores"):
+        return {topic: float(score) for topic, score in row["diagnostic_scores"].items()}
+
+    scores = {}
+    for entry in itertools.chain(row.get("gaps_identified") or [], row.get("strengths") or []):
+        if not isinstance(entry, dict) or "topic" not in entry:
+            continue
+        value = entry.get("confidence", entry.get("score"))
+        if value is None:
+            continue
+        value = float(value)
+        scores[entry["topic"]] = value * 100 if value <= 1 else value
+    return scores
+
+
+def as_number(value: Any, default: float) -> float:
+    """Coerce CSV strings and nulls to numbers."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, str):
+        return float(value) if "." in value else int(value)
+    return value
+
+
+def timestamp_ms(value: Union[None, int, float, str, date, datetime]) -> int:
+    """Unix milliseconds from an ISO string, date, datetime or epoch seconds (0 if missing)."""
+    if value is None or value == "":
+        return 0
+    if isinstance(value, (int, float)):
+        return int(value * 1000)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return int(value.timestamp() * 1000)
+
+
+def session_timestamp(row: Dict[str, Any]) -> int:
+    """When a row happened: started_at, else completed_at, else session_date (0 if none)."""
+    return timestamp_ms(row.get("started_at") or row.get("completed_at") or row.get("session_date"))
+
+
+def group_by_student(
+    rows: Iterable[Dict[str, Any]],
+    presorted: bool = True,
+    chunk_size: int = DEFAULT_SORT_CHUNK_SIZE
+) -> Iterator[Tuple[str, Iterator[Dict[str, Any]]]]:
+    """
+    Yield (student_id, rows) groups in ascending student_id order.
+
+    Trends compare a student's latest sessions with earlier ones, so each
+    group must be in chronological order. With presorted=True the rows must
+    already be ordered by (student_id, time) and are grouped on the fly.
+    Otherwise they are sorted externally by (student_id, session_timestamp,
+    export position) in chunks of chunk_size rows spilled to temp files;
+    undated rows sort first and keep their export order.
+    """
+    if not presorted:
+        rows = _external_sort(rows, chunk_size)
+
+    previous = None
+    for student_id, group in itertools.groupby(rows, key=lambda r: str(r["student_id"])):
+        if previous is not None and student_id < previous:
+            raise ValueError(
+                f"Export is not sorted by student_id ({student_id!r} after {previous!r}); "
+                "pass presorted=False"
+            )
+        previous = student_id
+        yield student_id, group
+
+
+def _external_sort(rows: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[Dict[str, Any]]:
+    """Sort rows by (student_id, session_timestamp, original position) using bounded memory."""
+    chunk_paths = []
+    try:
+        numbered = enumerate(rows)
+        while True:
+            chunk = [
+                (str(row["student_id"]), session_timestamp(row), seq, row)
+                for seq, row in itertools.islice(numbered, chunk_size)
+            ]
+            if not chunk:
+                break
+            chunk.sort(key=lambda item: item[:3])
+            fd, chunk_path = tempfile.mkstemp(prefix="session_ingest_", suffix=".jsonl")
+            chunk_paths.append(chunk_path)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for item in chunk:
+                    f.write(json.dumps(item))
+                    f.write("\n")
+
+        readers = [_read_chunk(path) for path in chunk_paths]
+        for _, _, _, row in heapq.merge(*readers, key=lambda item: (item[0], item[1], item[2])):
+            yield row
+    finally:
+        for chunk_path in chunk_paths:
+            try:
+                os.remove(chunk_path)
+            except OSError:
+                pass
+
+
+def _read_chunk(path: str) -> Iterator[List[Any]]:
+    """Read back one sorted spill file."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def iter_student_data(
+    session_rows: Iterable[Dict[str, Any]],
+    diagnostic_rows: Optional[Iterable[Dict[str, Any]]] = None,
+    presorted: bool = True,
+    chunk_size: int = DEFAULT_SORT_CHUNK_SIZE
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Merge-join session and diagnostic rows into per-student analyzer input.
+
+    Sessions are folded into a SessionTrendTracker as they stream past, so
+    only one student's diagnostic scores and trend state are held at a time.
+    """
+    sessions = group_by_student(session_rows, presorted, chunk_size)
+    diagnostics = group_by_student(diagnostic_rows or [], presorted, chunk_size)
+
+    next_session = next(sessions, None)
+    next_diagnostic = next(diagnostics, None)
+
+    while next_session is not None or next_diagnostic is not None:
+        session_id = next_session[0] if next_session is not None else None
+        diagnostic_id = next_diagnostic[0] if next_diagnostic is not None else None
+        if session_id is None:
+            student_id = diagnostic_id
+        elif diagnostic_id is None:
+            student_id = session_id
+        else:
+            student_id = min(session_id, diagnostic_id)
+
+        diagnostic_scores: Dict[str, float] = {}
+        if diagnostic_id == student_id:
+            for row in next_diagnostic[1]:
+                diagnostic_scores.update(diagnostic_scores_from_row(row))
+            next_diagnostic = next(diagnostics, None)
+
+        tracker = SessionTrendTracker()
+        if session_id == student_id:
+            for row in next_session[1]:
+                tracker.add_session(session_from_row(row))
+            next_session = next(sessions, None)
+
+        yield student_id, {
+            "diagnostic_scores": diagnostic_scores,
+            "recent_sessions": [],
+            "trend_tracker": tracker
+        }
+
+
+def analyze_exports(
+    sessions_path: str,
+    diagnostics_path: Optional[str] = None,
+    presorted: bool = True,
+    chunk_size: int = DEFAULT_SORT_CHUNK_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """Stream analyze_student_gaps results for every student in the exports."""
+    diagnostic_rows = read_export(diagnostics_path) if diagnostics_path else None
+    for student_id, student_data in iter_student_data(
+        read_export(sessions_path), diagnostic_rows, presorted, chunk_size
+    ):
+        result = analyze_student_gaps(student_data)
+        yield {"student_id": student_id, **result}
+
+
+def write_results(results: Iterable[Dict[str, Any]], out: TextIO) -> int:
+    """Write results as JSON lines as they are produced; returns the count written."""
+    count = 0
+    for result in results:
+        out.write(json.dumps(result))
+        out.write("\n")
+        count += 1
+    return count
+
+
+# Example usage
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Analyze practice_sessions / diagnostics exports")
+    parser.add_argument("sessions", help="practice_sessions export (.jsonl or .csv, optionally .gz)")
+    parser.add_argument("--diagnostics", help="diagnostics export (.jsonl or .csv, optionally .gz)")
+    parser.add_argument("--output", help="JSONL output path (default: stdout)")
+    parser.add_argument("--unsorted", action="store_true",
+                        help="exports are not ordered by (student_id, time); sort them externally first")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_SORT_CHUNK_SIZE,
+                        help="rows per in-memory chunk when sorting")
+    args = parser.parse_args()
+
+    results = analyze_exports(args.sessions, args.diagnostics, not args.unsorted, args.chunk_size)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            count = write_results(results, out)
+    else:
+        count = write_results(results, sys.stdout)
+    print(f"Analyzed {count} students", file=sys.stderr)
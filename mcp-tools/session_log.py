@@ -0,0 +1,364 @@
+"""
+Binary Session Log for Adaptive Maths Tutor
+Append-only fixed-record session history, read through mmap.
+"""
+
+from array import array
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+import json
+import math
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from session_columns import SessionColumns, TopicTable
+from session_ingest import as_number, question_tallies, session_timestamp
+
+MAGIC = b"MWSLOG01"
+HEADER = struct.Struct("<8sII")  # magic, record size, reserved
+
+RECORD_DTYPE = np.dtype([
+    ("student", "<u4"),
+    ("timestamp", "<i8"),  # Unix milliseconds
+    ("topic", "<u2"),
+    ("correct", "<u2"),
+    ("total", "<u2")
+])
+_RECORD = struct.Struct("<IqHHH")
+
+# Topic ID of the record that opens each session and carries its overall counts
+SESSION_TOPIC = 0xFFFF
+MAX_COUNT = 0xFFFF
+
+# Topic scores given without question counts are stored as score * 100 out of this
+SCORE_SCALE = 10000
+
+# Buffered bytes written per flush from the append path
+FLUSH_BYTES = 1 << 20
+
+
+class SessionLog:
+    """
+    Append-only session history for many students in one file.
+
+    Each session is a run of fixed 18-byte records: one SESSION_TOPIC record
+    with the session's correct/total, then one per topic with that topic's
+    correct/total. Student IDs and topic names are interned to integers;
+    the name tables live in a JSON sidecar (<path>.meta.json).
+
+    The in-memory index maps each student to the [start, end) record
+    ranges ("runs") they own. Appending a student's sessions back to back,
+    as the ingestion path does, extends one run, so reading a student's
+    recent sessions is a slice of the mmapped file. compact() rewrites the
+    file so every student is a single run.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.meta_path = path + ".meta.json"
+        self.topics = TopicTable()
+        self.students: List[str] = []
+        self.student_ids: Dict[str, int] = {}
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            for name in meta["topics"]:
+                self.topics.intern(name)
+            for student in meta["students"]:
+                self._student_id(student)
+        self._saved_names = (len(self.topics), len(self.students))
+
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, RECORD_DTYPE.itemsize, 0))
+        self._open()
+
+    def _open(self) -> None:
+        """Check the header, drop a torn trailing record and index the file."""
+        with open(self.path, "rb") as f:
+            magic, record_size, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{self.path} is not a session log")
+        size = os.path.getsize(self.path)
+        whole = HEADER.size + (size - HEADER.size) // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+        if whole != size:
+            os.truncate(self.path, whole)
+
+        self._file = open(self.path, "ab")
+        self._pending = bytearray()
+        self._written = (whole - HEADER.size) // RECORD_DTYPE.itemsize
+        self._appended = self._written
+        self._map: Optional[mmap.mmap] = None
+        self._records = np.empty(0, dtype=RECORD_DTYPE)
+
+        self._runs: Dict[int, List[List[int]]] = {}
+        self._last_student: Optional[int] = None
+        students = self.records()["student"]
+        if len(students):
+            starts = np.concatenate(([0], np.flatnonzero(students[1:] != students[:-1]) + 1))
+            ends = np.append(starts[1:], len(students))
+            for student, start, end in zip(students[starts].tolist(), starts.tolist(), ends.tolist()):
+                self._runs.setdefault(student, []).append([start, end])
+            self._last_student = int(students[-1])
+
+    def _student_id(self, student: str) -> int:
+        """Integer ID for a student, assigning one on first use."""
+        student_id = self.student_ids.get(student)
+        if student_id is None:
+            student_id = self.student_ids[student] = len(self.students)
+            self.students.append(student)
+        return student_id
+
+    # Writing
+
+    def append_session(
+        self,
+        student: str,
+        timestamp: int,
+        correct: int,
+        total: int,
+        topic_counts: Iterable[Tuple[str, int, int]] = ()
+    ) -> None:
+        """
+        Append one session.
+
+        Args:
+            student: Student ID
+            timestamp: Unix milliseconds (see session_ingest.timestamp_ms)
+            correct / total: Questions right and attempted in the session
+            topic_counts: (topic, correct, attempted) per topic covered
+        """
+        student_id = self._student_id(str(student))
+        records = [(SESSION_TOPIC, correct, total)]
+        for topic, topic_correct, topic_total in topic_counts:
+            topic_id = self.topics.intern(topic)
+            if topic_id >= SESSION_TOPIC:
+                raise ValueError("Topic table is full")
+            records.append((topic_id, topic_correct, topic_total))
+
+        if not all(0 <= c <= MAX_COUNT and 0 <= t <= MAX_COUNT for _, c, t in records):
+            raise ValueError(f"Counts must be between 0 and {MAX_COUNT}")
+        pack = _RECORD.pack
+        for topic_id, record_correct, record_total in records:
+            self._pending += pack(student_id, timestamp, topic_id, int(record_correct), int(record_total))
+
+        start = self._appended
+        self._appended += len(records)
+        if student_id == self._last_student:
+            self._runs[student_id][-1][1] = self._appended
+        else:
+            self._runs.setdefault(student_id, []).append([start, self._appended])
+            self._last_student = student_id
+
+        if len(self._pending) >= FLUSH_BYTES:
+            self.flush()
+
+    def append_row(self, row: Dict[str, Any]) -> None:
+        """
+        Append a practice_sessions row.
+
+        Question items are tallied per topic as in session_ingest. Rows that
+        already carry questions_correct / questions_total are coerced as
+        session_from_row does and store each topic score as score * 100 out
+        of SCORE_SCALE. Values a record cannot hold (fractional counts,
+        non-numeric scores) raise ValueError rather than being altered.
+        """
+        timestamp = session_timestamp(row)
+        if "questions_total" in row or "questions_correct" in row:
+            correct = _record_count("questions_correct", as_number(row.get("questions_correct"), 0))
+            total = _record_count("questions_total", as_number(row.get("questions_total"), 1))
+            topic_counts = [
+                (topic, _record_score(topic, score), SCORE_SCALE)
+                for topic, score in (row.get("topics_covered") or {}).items()
+            ]
+        else:
+            correct, total, counts = question_tallies(row)
+            total = _record_count("total_attempts", total)
+            topic_counts = [(topic, hits, attempts) for topic, (hits, attempts) in counts.items()]
+        self.append_session(row["student_id"], timestamp, correct, total, topic_counts)
+
+    def flush(self) -> None:
+        """Write buffered records (and any new names) to disk."""
+        if (len(self.topics), len(self.students)) != self._saved_names:
+            # Names go first, so records on disk never reference unknown IDs
+            tmp_path = self.meta_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"topics": self.topics.names, "students": self.students}, f)
+            os.replace(tmp_path, self.meta_path)
+            self._saved_names = (len(self.topics), len(self.students))
+        if self._pending:
+            self._file.write(self._pending)
+            self._file.flush()
+            self._pending = bytearray()
+            self._written = self._appended
+
+    # Reading
+
+    def records(self) -> np.ndarray:
+        """Every record as a read-only array over the mmapped file."""
+        if self._pending:
+            self.flush()
+        if len(self._records) != self._written:
+            if self._written:
+                # The previous map stays alive while views into it exist
+                with open(self.path, "rb") as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._records = np.frombuffer(
+                    self._map, dtype=RECORD_DTYPE, count=self._written, offset=HEADER.size
+                )
+        return self._records
+
+    def last_sessions(self, student: str, n: Optional[int] = None) -> np.ndarray:
+        """
+        Records of a student's last n sessions (all when n is None), oldest first.
+
+        A zero-copy view of the file when those sessions lie in the
+        student's latest run; otherwise the runs involved are concatenated.
+        """
+        student_id = self.student_ids.get(str(student))
+        if student_id is None or not self._runs.get(student_id):
+            return np.empty(0, dtype=RECORD_DTYPE)
+        records = self.records()
+        pieces = []
+        remaining = n
+        for start, end in reversed(self._runs[student_id]):
+            run = records[start:end]
+            if remaining is not None:
+                heads = np.flatnonzero(run["topic"] == SESSION_TOPIC)
+                if len(heads) >= remaining:
+                    pieces.append(run[heads[len(heads) - remaining]:] if remaining else run[:0])
+                    break
+                remaining -= len(heads)
+            pieces.append(run)
+        if len(pieces) == 1:
+            return pieces[0]
+        return np.concatenate(pieces[::-1])
+
+    def session_columns(self, student: str, n: Optional[int] = None) -> SessionColumns:
+        """
+        A student's last n sessions as SessionColumns for analyze_student_gaps.
+
+        Built with array operations on the records; topic scores are
+        correct / total * 100 per topic record.
+        """
+        return columns_from_records(self.last_sessions(student, n), self.topics)
+
+    def student_data(
+        self,
+        student: str,
+        diagnostic_scores: Optional[Dict[str, float]] = None,
+        n: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """analyze_student_gaps input for one student."""
+        return {"diagnostic_scores": diagnostic_scores or {}, "recent_sessions": self.session_columns(student, n)}
+
+    # Maintenance
+
+    def compact(self) -> None:
+        """Rewrite the log so each student's records are contiguous, keeping their order."""
+        records = self.records()
+        order = np.argsort(records["student"], kind="stable")
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, RECORD_DTYPE.itemsize, 0))
+            f.write(records[order].tobytes())
+        self._file.close()
+        self._map = None
+        self._records = np.empty(0, dtype=RECORD_DTYPE)
+        os.replace(tmp_path, self.path)
+        self._open()
+
+    def close(self) -> None:
+        """Flush and close the file."""
+        self.flush()
+        self._file.close()
+
+    def __enter__(self) -> "SessionLog":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self._appended
+
+    def stats(self) -> Dict[str, Any]:
+        """Record, student and run counts plus file size."""
+        runs = sum(len(student_runs) for student_runs in self._runs.values())
+        return {
+            "records": self._appended,
+            "students": len(self.students),
+            "topics": len(self.topics),
+            "runs": runs,
+            "runs_per_student": round(runs / len(self._runs), 2) if self._runs else 0.0,
+            "bytes": HEADER.size + self._appended * RECORD_DTYPE.itemsize
+        }
+
+
+def _record_count(field: str, value: Any) -> int:
+    """A session count as stored in a record; only whole numbers fit."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not float(value).is_integer():
+        raise ValueError(f"{field} must be a whole number to be stored in a session log, got {value!r}")
+    return int(value)
+
+
+def _record_score(topic: str, score: Any) -> int:
+    """A topic score (0-100) as a count out of SCORE_SCALE."""
+    try:
+        value = float(as_number(score, None))
+        if not math.isfinite(value):
+            raise ValueError
+    except (TypeError, ValueError):
+        raise ValueError(f"Score for topic {topic!r} must be a number to be stored in a session log, got {score!r}")
+    return round(value * SCORE_SCALE / 100)
+
+
+def columns_from_records(records: np.ndarray, topics: TopicTable) -> SessionColumns:
+    """Convert session log records (starting at a session record) to SessionColumns."""
+    columns = SessionColumns(topics)
+    if not len(records):
+        return columns
+    is_head = records["topic"] == SESSION_TOPIC
+    heads = np.flatnonzero(is_head)
+    topic_records = records[~is_head]
+    topic_correct = topic_records["correct"].astype(np.float64)
+    topic_totals = topic_records["total"].astype(np.float64)
+    scores = np.divide(topic_correct, topic_totals, out=np.zeros(len(topic_records)), where=topic_totals > 0) * 100
+    # Stored scores divide back exactly (58.0 rather than 5800 / 10000 * 100)
+    stored = topic_totals == SCORE_SCALE
+    scores[stored] = topic_correct[stored] / (SCORE_SCALE / 100)
+
+    columns.correct = array("d", records["correct"][heads].astype(np.float64).tobytes())
+    columns.total = array("d", records["total"][heads].astype(np.float64).tobytes())
+    # Topic records before each session record, then the overall count
+    offsets = np.append(heads - np.arange(len(heads)), len(topic_records)).astype(np.int64)
+    columns.topic_offsets = array("q", offsets.tobytes())
+    columns.topic_ids = array("H", topic_records["topic"].astype(np.uint16).tobytes())
+    columns.topic_scores = array("d", scores.tobytes())
+    return columns
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+
+    from student_analyzer import analyze_student_gaps
+
+    path = os.path.join(tempfile.mkdtemp(), "sessions.log")
+    with SessionLog(path) as log:
+        for day in range(1, 8):
+            log.append_row({
+                "student_id": "student-1",
+                "started_at": f"2026-01-{day:02d}T09:00:00+00:00",
+                "warmup_questions": [
+                    {"topic": "multiplication_tables", "correct": day > 3},
+                    {"topic": "division", "correct": day % 2 == 0}
+                ],
+                "stretch_questions": [{"topic": "division", "correct": True}]
+            })
+        recent = log.last_sessions("student-1", 3)
+        print("Last 3 sessions:", len(recent), "records, zero-copy:", np.shares_memory(recent, log.records()))
+        print("Log Stats:", log.stats())
+        print(json.dumps(analyze_student_gaps(log.student_data("student-1", {"division": 55}, n=5)), indent=2))
@@ -3,7 +3,13 @@ Student Gap Analyzer for Adaptive Maths Tutor
 Analyzes diagnostic data to identify learning gaps and recommend focus areas.
 """
 
-from typing import Dict, List, Any
+from collections import deque
+from typing import Dict, List, Any, Iterable, Tuple, Union
+
+import numpy as np
+
+from result_types import Difficulty, FocusArea, GapAnalysis, Priority, Reason
+from session_columns import SessionColumns
 
 TOOL_METADATA = {
     "name": "analyze_student_gaps",
@@ -56,15 +62,83 @@ TOPIC_PREREQUISITES = {
     "addition_subtraction": ["place_value", "counting"]
 }
 
+MAX_FOCUS_AREAS = 5
+
+
+class PrerequisiteGraph:
+    """
+    TOPIC_PREREQUISITES compiled into an indexed DAG.
 
-def analyze_student_gaps(student_data: Dict[str, Any]) -> Dict[str, Any]:
+    Topics are numbered in topological order (prerequisites before the topics
+    that need them), and each topic carries a bitset of every transitive
+    prerequisite, so "which prerequisites of X are weak" is a single AND.
+    """
+
+    def __init__(self, prerequisites: Dict[str, List[str]]):
+        self.order: List[str] = []
+        self.index: Dict[str, int] = {}
+        visiting = set()
+
+        def visit(topic: str) -> None:
+            if topic in self.index:
+                return
+            if topic in visiting:
+                raise ValueError(f"Prerequisite cycle through '{topic}'")
+            visiting.add(topic)
+            for prereq in prerequisites.get(topic, []):
+                visit(prereq)
+            visiting.discard(topic)
+            self.index[topic] = len(self.order)
+            self.order.append(topic)
+
+        for topic in prerequisites:
+            visit(topic)
+
+        # Prerequisites always have lower indices, so one pass in order suffices
+        self.closure: List[int] = [0] * len(self.order)
+        for i, topic in enumerate(self.order):
+            for prereq in prerequisites.get(topic, []):
+                j = self.index[prereq]
+                self.closure[i] |= (1 << j) | self.closure[j]
+
+    def mask(self, topics: List[str]) -> int:
+        """Bitset of the given topics (topics outside the graph are ignored)."""
+        bits = 0
+        for topic in topics:
+            i = self.index.get(topic)
+            if i is not None:
+                bits |= 1 << i
+        return bits
+
+    def prerequisites_in(self, topic: str, mask: int) -> List[str]:
+        """Transitive prerequisites of topic that are in mask, in topological order."""
+        i = self.index.get(topic)
+        if i is None:
+            return []
+        hits = self.closure[i] & mask
+        found = []
+        while hits:
+            low = hits & -hits
+            found.append(self.order[low.bit_length() - 1])
+            hits ^= low
+        return found
+
+
+PREREQUISITE_GRAPH = PrerequisiteGraph(TOPIC_PREREQUISITES)
+
+
+def analyze_student_gaps(student_data: Dict[str, Any], compact: bool = False) -> Union[Dict[str, Any], GapAnalysis]:
     """
     Analyze student diagnostic data to identify gaps and recommend focus areas.
     
     Args:
         student_data: Dictionary containing:
             - diagnostic_scores: Dict mapping topic names to scores (0-100)
-            - recent_sessions: List of session objects with performance data
+            - recent_sessions: List of session objects with performance data,
+              or a SessionColumns holding the same sessions
+            - trend_tracker: Optional SessionTrendTracker already fed this
+              student's sessions; used instead of rescanning recent_sessions
+        compact: Return a GapAnalysis (to_dict() gives the usual dict)
     
     Returns:
         Dictionary containing:
@@ -74,12 +148,16 @@ def analyze_student_gaps(student_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     diagnostic_scores = student_data.get("diagnostic_scores", {})
     recent_sessions = student_data.get("recent_sessions", [])
+    trend_tracker = student_data.get("trend_tracker")
     
     # Identify weak topics based on diagnostic scores
     weak_topics = _identify_weak_topics(diagnostic_scores)
     
     # Analyze session trends to refine understanding
-    session_trends = _analyze_session_trends(recent_sessions)
+    if trend_tracker is not None:
+        session_trends = trend_tracker.trends()
+    else:
+        session_trends = _analyze_session_trends(recent_sessions)
     
     # Determine recommended difficulty based on overall performance
     recommended_difficulty = _determine_difficulty(diagnostic_scores, session_trends)
@@ -87,10 +165,12 @@ def analyze_student_gaps(student_data: Dict[str, Any]) -> Dict[str, Any]:
     # Generate prioritized focus areas
     focus_areas = _generate_focus_areas(weak_topics, diagnostic_scores, session_trends)
     
+    if compact:
+        return GapAnalysis(weak_topics, recommended_difficulty, focus_areas)
     return {
         "weak_topics": weak_topics,
-        "recommended_difficulty": recommended_difficulty,
-        "focus_areas": focus_areas
+        "recommended_difficulty": recommended_difficulty.value,
+        "focus_areas": [area.to_dict() for area in focus_areas]
     }
 
 
@@ -108,62 +188,143 @@ def _identify_weak_topics(scores: Dict[str, float]) -> List[str]:
 
 def _analyze_session_trends(sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Analyze recent session data for performance trends."""
-    if not sessions:
-        return {"trend": "insufficient_data", "improving_topics": [], "declining_topics": []}
-    
-    # Calculate average performance over recent sessions
-    total_correct = 0
-    total_questions = 0
-    topic_performance = {}
-    
-    for session in sessions:
-        correct = session.get("questions_correct", 0)
-        total = session.get("questions_total", 1)
-        total_correct += correct
-        total_questions += total
-        
-        # Track per-topic performance if available
-        session_topics = session.get("topics_covered", {})
-        for topic, perf in session_topics.items():
-            if topic not in topic_performance:
-                topic_performance[topic] = []
-            topic_performance[topic].append(perf)
-    
-    # Determine overall trend
-    avg_score = (total_correct / total_questions * 100) if total_questions > 0 else 0
-    
-    # Identify improving and declining topics
-    improving = []
-    declining = []
-    
-    for topic, performances in topic_performance.items():
-        if len(performances) >= MIN_SESSIONS_FOR_TREND:
-            recent_avg = sum(performances[-3:]) / 3
-            earlier_avg = sum(performances[:-3]) / max(len(performances) - 3, 1)
-            
-            if recent_avg > earlier_avg + 10:
-                improving.append(topic)
-            elif recent_avg < earlier_avg - 10:
-                declining.append(topic)
-    
-    trend = "stable"
-    if len(improving) > len(declining):
-        trend = "improving"
-    elif len(declining) > len(improving):
-        trend = "declining"
-    
-    return {
-        "trend": trend,
-        "average_score": avg_score,
-        "improving_topics": improving,
-        "declining_topics": declining
-    }
+    tracker = SessionTrendTracker()
+    for correct, total, topic_scores in _session_records(sessions):
+        tracker.add_record(correct, total, topic_scores)
+    return tracker.trends()
+
+
+def _session_records(sessions: Any) -> Iterable[Tuple[float, float, Iterable[Tuple[str, float]]]]:
+    """Yield (correct, total, topic scores) from session dicts or SessionColumns."""
+    if isinstance(sessions, SessionColumns):
+        return sessions.records()
+    return (
+        (
+            session.get("questions_correct", 0),
+            session.get("questions_total", 1),
+            session.get("topics_covered", {}).items()
+        )
+        for session in sessions
+    )
 
 
-def _determine_difficulty(scores: Dict[str, float], trends: Dict[str, Any]) -> str:
+class _TopicTrend:
+    """Running per-topic state: earlier-score sum and the last few scores."""
+
+    __slots__ = ("order", "count", "earlier_sum", "recent", "state")
+
+    def __init__(self, order: int):
+        self.order = order
+        self.count = 0
+        self.earlier_sum = 0
+        self.recent: deque = deque(maxlen=MIN_SESSIONS_FOR_TREND)
+        self.state = "stable"
+
+
+class SessionTrendTracker:
+    """
+    Incremental replacement for rescanning a student's whole session history.
+
+    Keeps per-topic running sums and a ring buffer of the last
+    MIN_SESSIONS_FOR_TREND scores, so add_session costs O(topics in session)
+    regardless of history length. trends() matches _analyze_session_trends
+    over every session added so far.
+    """
+
+    def __init__(self):
+        self.session_count = 0
+        self.total_correct = 0
+        self.total_questions = 0
+        self._topics: Dict[str, _TopicTrend] = {}
+        self._improving: Dict[str, _TopicTrend] = {}
+        self._declining: Dict[str, _TopicTrend] = {}
+
+    def add_session(self, session: Dict[str, Any]) -> None:
+        """Fold one practice session into the running totals."""
+        self.add_record(
+            session.get("questions_correct", 0),
+            session.get("questions_total", 1),
+            session.get("topics_covered", {}).items()
+        )
+
+    def add_record(self, correct: float, total: float, topic_scores: Iterable[Tuple[str, float]]) -> None:
+        """Fold one session given as raw values (see SessionColumns.records)."""
+        self.session_count += 1
+        self.total_correct += correct
+        self.total_questions += total
+
+        for topic, perf in topic_scores:
+            state = self._topics.get(topic)
+            if state is None:
+                state = self._topics[topic] = _TopicTrend(len(self._topics))
+            self._add_score(topic, state, perf)
+
+    def _add_score(self, topic: str, state: _TopicTrend, perf: float) -> None:
+        """Push one topic score and reclassify that topic."""
+        if len(state.recent) == MIN_SESSIONS_FOR_TREND:
+            state.earlier_sum += state.recent[0]
+        state.recent.append(perf)
+        state.count += 1
+
+        if state.count < MIN_SESSIONS_FOR_TREND:
+            return
+
+        recent_avg = sum(state.recent) / MIN_SESSIONS_FOR_TREND
+        earlier_avg = state.earlier_sum / max(state.count - MIN_SESSIONS_FOR_TREND, 1)
+
+        if recent_avg > earlier_avg + 10:
+            new_state = "improving"
+        elif recent_avg < earlier_avg - 10:
+            new_state = "declining"
+        else:
+            new_state = "stable"
+
+        if new_state != state.state:
+            self._improving.pop(topic, None)
+            self._declining.pop(topic, None)
+            if new_state == "improving":
+                self._improving[topic] = state
+            elif new_state == "declining":
+                self._declining[topic] = state
+            state.state = new_state
+
+    @property
+    def trend(self) -> str:
+        """Overall trend label for the sessions seen so far."""
+        if not self.session_count:
+            return "insufficient_data"
+        if len(self._improving) > len(self._declining):
+            return "improving"
+        if len(self._declining) > len(self._improving):
+            return "declining"
+        return "stable"
+
+    def trends(self) -> Dict[str, Any]:
+        """Return the same summary dict as _analyze_session_trends."""
+        if not self.session_count:
+            return {"trend": "insufficient_data", "improving_topics": [], "declining_topics": []}
+
+        avg_score = (
+            self.total_correct / self.total_questions * 100
+        ) if self.total_questions > 0 else 0
+
+        return {
+            "trend": self.trend,
+            "average_score": avg_score,
+            "improving_topics": _in_first_seen_order(self._improving),
+            "declining_topics": _in_first_seen_order(self._declining)
+        }
+
+
+def _in_first_seen_order(topics: Dict[str, _TopicTrend]) -> List[str]:
+    """List flagged topics in the order they first appeared in the sessions."""
+    return sorted(topics, key=lambda t: topics[t].order)
+
+
+def _determine_difficulty(scores: Dict[str, float], trends: Dict[str, Any]) -> Difficulty:
     """Determine appropriate difficulty level."""
     if not scores:
-        return "foundation"
+        return Difficulty.FOUNDATION
     
     avg_score = sum(scores.values()) / len(scores)
     trend = trends.get("trend", "stable")
@@ -175,61 +336,327 @@ def _determine_difficulty(scores: Dict[str, float], trends: Dict[str, Any]) -> s
         avg_score -= 5  # More support for declining students
     
     if avg_score >= 75:
-        return "challenge"
+        return Difficulty.CHALLENGE
     elif avg_score >= 50:
-        return "core"
+        return Difficulty.CORE
     else:
-        return "foundation"
+        return Difficulty.FOUNDATION
 
 
 def _generate_focus_areas(
     weak_topics: List[str], 
     scores: Dict[str, float],
     trends: Dict[str, Any]
-) -> List[Dict[str, Any]]:
+) -> List[FocusArea]:
     """Generate prioritized list of focus areas with specific skills."""
     focus_areas = []
+    seen = set()
+    weak_set = set(weak_topics)
     
     # Add declining topics as high priority
     declining = trends.get("declining_topics", [])
     for topic in declining:
-        if topic not in weak_topics:
-            focus_areas.append({
-                "topic": topic,
-                "priority": "high",
-                "reason": "recent_decline",
-                "suggested_approach": "review_fundamentals"
-            })
+        if topic not in weak_set and topic not in seen:
+            seen.add(topic)
+            focus_areas.append(FocusArea.get(topic, Priority.HIGH, Reason.RECENT_DECLINE))
     
-    # Add weak topics based on prerequisites
+    # Add weak topics based on prerequisites, at any depth
+    weak_mask = PREREQUISITE_GRAPH.mask(weak_topics)
     for topic in weak_topics:
-        # Check if prerequisites are also weak
-        prereqs = TOPIC_PREREQUISITES.get(topic, [])
-        weak_prereqs = [p for p in prereqs if p in weak_topics]
+        if len(focus_areas) >= MAX_FOCUS_AREAS:
+            break
         
-        if weak_prereqs:
-            # Focus on prerequisites first
-            for prereq in weak_prereqs:
-                if not any(f["topic"] == prereq for f in focus_areas):
-                    focus_areas.append({
-                        "topic": prereq,
-                        "priority": "high",
-                        "reason": "prerequisite_gap",
-                        "suggested_approach": "build_foundation"
-                    })
+        # Focus on weak prerequisites first, most foundational first
+        for prereq in PREREQUISITE_GRAPH.prerequisites_in(topic, weak_mask):
+            if prereq not in seen:
+                seen.add(prereq)
+                focus_areas.append(FocusArea.get(prereq, Priority.HIGH, Reason.PREREQUISITE_GAP))
         
         # Then add the topic itself
-        if not any(f["topic"] == topic for f in focus_areas):
-            priority = "high" if scores.get(topic, 0) < 40 else "medium"
-            focus_areas.append({
-                "topic": topic,
-                "priority": priority,
-                "reason": "diagnostic_gap",
-                "suggested_approach": "targeted_practice"
-            })
+        if topic not in seen:
+            seen.add(topic)
+            priority = Priority.HIGH if scores.get(topic, 0) < 40 else Priority.MEDIUM
+            focus_areas.append(FocusArea.get(topic, priority, Reason.DIAGNOSTIC_GAP))
     
-    # Limit to top 5 focus areas
-    return focus_areas[:5]
+    # Limit to top focus areas
+    return focus_areas[:MAX_FOCUS_AREAS]
+
+
+def build_cohort_arrays(students: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Pack a list of per-student dicts into the array layout used by analyze_cohort_gaps.
+
+    recent_sessions may be lists of session dicts or SessionColumns.
+
+    Topics are assigned columns in order of first appearance across the cohort,
+    first from diagnostic scores and then from session topics. Each
+    student's own key order is kept in diagnostic_rank and
+    session_topic_rank, so ties are broken as analyze_student_gaps does.
+    """
+    topic_index: Dict[str, int] = {}
+    for student in students:
+        for topic in student.get("diagnostic_scores", {}):
+            topic_index.setdefault(topic, len(topic_index))
+    for student in students:
+        for _, _, topic_scores in _session_records(student.get("recent_sessions", [])):
+            for topic, _ in topic_scores:
+                topic_index.setdefault(topic, len(topic_index))
+
+    n_topics = len(topic_index)
+    score_matrix = np.full((len(students), n_topics), np.nan)
+    diagnostic_rank = np.zeros((len(students), n_topics), dtype=np.int64)
+    session_offsets = np.zeros(len(students) + 1, dtype=np.int64)
+    correct = []
+    totals = []
+    session_rows = []
+    session_ranks = []
+
+    for i, student in enumerate(students):
+        for rank, (topic, score) in enumerate(student.get("diagnostic_scores", {}).items()):
+            score_matrix[i, topic_index[topic]] = score
+            diagnostic_rank[i, topic_index[topic]] = rank
+        sessions = student.get("recent_sessions", [])
+        for session_correct, session_total, topic_scores in _session_records(sessions):
+            correct.append(session_correct)
+            totals.append(session_total)
+            row = np.full(n_topics, np.nan)
+            ranks = np.zeros(n_topics, dtype=np.int64)
+            for rank, (topic, perf) in enumerate(topic_scores):
+                row[topic_index[topic]] = perf
+                ranks[topic_index[topic]] = rank
+            session_rows.append(row)
+            session_ranks.append(ranks)
+        session_offsets[i + 1] = session_offsets[i] + len(sessions)
+
+    return {
+        "topics": list(topic_index),
+        "score_matrix": score_matrix,
+        "session_offsets": session_offsets,
+        "questions_correct": np.asarray(correct, dtype=float),
+        "questions_total": np.asarray(totals, dtype=float),
+        "session_topic_scores": (
+            np.vstack(session_rows) if session_rows else np.empty((0, n_topics))
+        ),
+        "diagnostic_rank": diagnostic_rank,
+        "session_topic_rank": (
+            np.vstack(session_ranks) if session_ranks else np.empty((0, n_topics), dtype=np.int64)
+        ),
+    }
+
+
+def analyze_cohort_gaps(cohort_data: Dict[str, Any], compact: bool = False) -> List[Union[Dict[str, Any], GapAnalysis]]:
+    """
+    Analyze a whole cohort in one vectorized pass.
+
+    Args:
+        cohort_data: Dictionary containing:
+            - topics: Topic names, one per matrix column
+            - score_matrix: (students x topics) diagnostic scores, NaN where not assessed
+            - session_offsets: (students + 1) offsets into the session arrays;
+              student i owns sessions session_offsets[i]:session_offsets[i + 1]
+            - questions_correct: Per-session correct counts
+            - questions_total: Per-session question counts
+            - session_topic_scores: (sessions x topics) topic scores, NaN where not covered
+            - diagnostic_rank: (students x topics) position of each topic in
+              the student's diagnostic_scores (optional, default column order)
+            - session_topic_rank: (sessions x topics) position of each topic in
+              the session's topics_covered (optional, default column order)
+        compact: Return GapAnalysis objects instead of dicts
+
+    Returns:
+        One result per student, identical to analyze_student_gaps when the
+        ranks are given (build_cohort_arrays fills them). Without them,
+        weak topics with equal scores and declining topics first seen in
+        the same session are ordered by column.
+    """
+    topics = list(cohort_data["topics"])
+    scores = np.asarray(cohort_data["score_matrix"], dtype=float)
+    offsets = np.asarray(cohort_data["session_offsets"], dtype=np.int64)
+    session_scores = np.asarray(cohort_data["session_topic_scores"], dtype=float)
+    n_students = scores.shape[0]
+
+    if offsets.shape != (n_students + 1,) or offsets[-1] != session_scores.shape[0]:
+        raise ValueError("session_offsets does not match score_matrix and session arrays")
+    column_order = np.arange(len(topics), dtype=np.int64)
+    diagnostic_rank = np.broadcast_to(cohort_data.get("diagnostic_rank", column_order), scores.shape)
+    session_rank = np.broadcast_to(cohort_data.get("session_topic_rank", column_order), session_scores.shape)
+
+    assessed = ~np.isnan(scores)
+
+    # Weak topics, weakest first; ties keep the student's key order
+    weak_mask = assessed & (np.where(assessed, scores, np.inf) < WEAK_TOPIC_THRESHOLD)
+    weak_order = np.lexsort((diagnostic_rank, np.where(weak_mask, scores, np.inf)), axis=1)
+    weak_counts = weak_mask.sum(axis=1)
+
+    # Session trends
+    improving, declining, first_seen = _cohort_topic_trends(offsets, session_scores, session_rank)
+    trend_shift = np.sign(improving.sum(axis=1) - declining.sum(axis=1)) * 5
+
+    # Difficulty bands
+    n_assessed = assessed.sum(axis=1)
+    avg_scores = np.divide(
+        np.where(assessed, scores, 0.0).sum(axis=1), n_assessed,
+        out=np.zeros(n_students), where=n_assessed > 0
+    ) + trend_shift
+    difficulty = np.where(
+        avg_scores >= 75, "challenge", np.where(avg_scores >= 50, "core", "foundation")
+    )
+    difficulty[n_assessed == 0] = "foundation"
+
+    # Declining topics per student, in order of first appearance in their sessions
+    declining_by_student: Dict[int, List[str]] = {}
+    rows, cols = np.nonzero(declining)
+    order = np.lexsort((first_seen[rows, cols], rows))
+    for i, c in zip(rows[order].tolist(), cols[order].tolist()):
+        declining_by_student.setdefault(i, []).append(topics[c])
+
+    results = []
+    score_rows = scores.tolist()
+    for i, (order_row, n_weak, band) in enumerate(
+        zip(weak_order.tolist(), weak_counts.tolist(), difficulty.tolist())
+    ):
+        weak_cols = order_row[:n_weak]
+        weak_topics = [topics[c] for c in weak_cols]
+        trends = {"declining_topics": declining_by_student.get(i, [])}
+        weak_scores = {topics[c]: score_rows[i][c] for c in weak_cols}
+        focus_areas = _generate_focus_areas(weak_topics, weak_scores, trends)
+        if compact:
+            results.append(GapAnalysis(weak_topics, Difficulty(band), focus_areas))
+        else:
+            results.append({
+                "weak_topics": weak_topics,
+                "recommended_difficulty": band,
+                "focus_areas": [area.to_dict() for area in focus_areas]
+            })
+
+    return results
+
+
+def _cohort_topic_trends(
+    offsets: np.ndarray,
+    session_scores: np.ndarray,
+    session_rank: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vectorized per-student improving/declining flags (students x topics),
+    plus a first-seen key ordering topics by session, then position within it.
+    """
+    covered = ~np.isnan(session_scores)
+    values = np.where(covered, session_scores, 0.0)
+
+    # Rank each covered score from the end of its student's history (1 = latest)
+    seg_lengths = np.diff(offsets)
+    row_owner = np.repeat(np.arange(len(seg_lengths)), seg_lengths)
+    from_end = np.vstack([
+        np.cumsum(covered[::-1], axis=0)[::-1],
+        np.zeros((1, covered.shape[1]), dtype=np.int64)
+    ])
+    rank = from_end[:-1] - from_end[offsets[1:][row_owner]]
+    recent = covered & (rank <= MIN_SESSIONS_FOR_TREND)
+
+    counts = _segment_reduce(np.add, covered.astype(np.int64), offsets, 0)
+    recent_sum = _segment_reduce(np.add, np.where(recent, values, 0.0), offsets, 0.0)
+    earlier_sum = _segment_reduce(np.add, np.where(recent, 0.0, values), offsets, 0.0)
+
+    recent_avg = recent_sum / MIN_SESSIONS_FOR_TREND
+    earlier_avg = earlier_sum / np.maximum(counts - MIN_SESSIONS_FOR_TREND, 1)
+    has_trend = counts >= MIN_SESSIONS_FOR_TREND
+    improving = has_trend & (recent_avg > earlier_avg + 10)
+    declining = has_trend & ~improving & (recent_avg < earlier_avg - 10)
+
+    seen_key = np.arange(covered.shape[0], dtype=np.int64)[:, None] * covered.shape[1] + session_rank
+    seen_key = np.where(covered, seen_key, np.iinfo(np.int64).max)
+    first_seen = _segment_reduce(np.minimum, seen_key, offsets, np.iinfo(np.int64).max)
+
+    return improving, declining, first_seen
+
+
+def _segment_reduce(ufunc: np.ufunc, values: np.ndarray, offsets: np.ndarray, empty: Any) -> np.ndarray:
+    """Reduce rows of values per offsets segment, filling empty segments with a default."""
+    out = np.full((len(offsets) - 1,) + values.shape[1:], empty, dtype=values.dtype)
+    starts = offsets[:-1]
+    nonempty = offsets[1:] > starts
+    if nonempty.any():
+        out[nonempty] = ufunc.reduceat(values, starts[nonempty], axis=0)
+    return out
+
+
+def cohort_report(cohort_data: Dict[str, Any], n_bins: int = 10) -> Dict[str, Any]:
+    """
+    Class-level summary of a cohort's diagnostic scores.
+
+    Args:
+        cohort_data: Cohort arrays as for analyze_cohort_gaps (only topics and
+            score_matrix are used)
+        n_bins: Number of equal-width score bins between 0 and 100
+
+    Returns:
+        Dictionary containing:
+            - topics: Per-topic summaries (assessed, weak/strong counts and
+              fractions, mean score), in column order
+            - bin_edges: The n_bins + 1 histogram edges
+            - score_histograms: (topics x n_bins) student counts per score bin
+            - percentile_ranks: (students x topics) percentile rank of each
+              score among students assessed on that topic, NaN where not assessed
+            - overall_percentile_ranks: Percentile rank of each student's
+              average diagnostic score, NaN for students with no scores
+    """
+    topics = list(cohort_data["topics"])
+    scores = np.asarray(cohort_data["score_matrix"], dtype=float)
+    n_students, n_topics = scores.shape
+    assessed = ~np.isnan(scores)
+
+    n_assessed = assessed.sum(axis=0)
+    weak_counts = (assessed & (np.where(assessed, scores, np.inf) < WEAK_TOPIC_THRESHOLD)).sum(axis=0)
+    strong_counts = (assessed & (np.where(assessed, scores, -np.inf) > STRONG_TOPIC_THRESHOLD)).sum(axis=0)
+    score_sums = np.where(assessed, scores, 0.0).sum(axis=0)
+
+    # Histograms: one bincount over (topic, bin) pairs
+    bin_edges = np.linspace(0, 100, n_bins + 1)
+    bins = np.clip(np.floor(scores / (100 / n_bins)), 0, n_bins - 1)
+    cells = (np.arange(n_topics) * n_bins + np.where(assessed, bins, 0)).astype(np.int64)[assessed]
+    histograms = np.bincount(cells, minlength=n_topics * n_bins).reshape(n_topics, n_bins)
+
+    percentile_ranks = np.full((n_students, n_topics), np.nan)
+    for c in range(n_topics):
+        percentile_ranks[assessed[:, c], c] = _percentile_ranks(scores[assessed[:, c], c])
+
+    per_student = assessed.sum(axis=1)
+    has_scores = per_student > 0
+    averages = np.where(assessed, scores, 0.0).sum(axis=1)[has_scores] / per_student[has_scores]
+    overall = np.full(n_students, np.nan)
+    overall[has_scores] = _percentile_ranks(averages)
+
+    summaries = []
+    for c, topic in enumerate(topics):
+        count = int(n_assessed[c])
+        summaries.append({
+            "topic": topic,
+            "assessed": count,
+            "weak_count": int(weak_counts[c]),
+            "weak_fraction": float(weak_counts[c] / count) if count else 0.0,
+            "strong_count": int(strong_counts[c]),
+            "strong_fraction": float(strong_counts[c] / count) if count else 0.0,
+            "mean_score": float(score_sums[c] / count) if count else None
+        })
+
+    return {
+        "topics": summaries,
+        "bin_edges": bin_edges,
+        "score_histograms": histograms,
+        "percentile_ranks": percentile_ranks,
+        "overall_percentile_ranks": overall
+    }
+
+
+def _percentile_ranks(values: np.ndarray) -> np.ndarray:
+    """Percent of values below each value, counting ties as half (0-100)."""
+    if values.size == 0:
+        return values.astype(float)
+    ordered = np.sort(values)
+    below = np.searchsorted(ordered, values, side="left")
+    ties = np.searchsorted(ordered, values, side="right") - below
+    return (below + 0.5 * ties) / values.size * 100
 
 
 # Example usage
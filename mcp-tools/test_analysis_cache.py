@@ -0,0 +1,48 @@
+"""
+Tests for the analysis result cache: memoized results must match uncached ones.
+"""
+
+import itertools
+
+from analysis_cache import AnalysisCache, fingerprint_student_data
+from student_analyzer import analyze_student_gaps
+
+
+def _permutations(scores):
+    """Every key order of a dict."""
+    return [dict(items) for items in itertools.permutations(scores.items())]
+
+
+def test_permuted_diagnostic_scores_match_uncached():
+    cache = AnalysisCache()
+    scores = {"division": 40, "fractions": 40, "place_value": 55}
+    for permuted in _permutations(scores):
+        student_data = {"diagnostic_scores": permuted, "recent_sessions": []}
+        assert cache.analyze(student_data) == analyze_student_gaps(student_data)
+
+
+def test_permuted_topics_covered_match_uncached():
+    cache = AnalysisCache()
+    topics = {"division": 50, "fractions": 45, "multiplication_tables": 48}
+    for permuted in _permutations(topics):
+        student_data = {
+            "diagnostic_scores": {"division": 62},
+            "recent_sessions": [
+                {"questions_correct": 8, "questions_total": 10, "topics_covered": dict(permuted)},
+                {"questions_correct": 5, "questions_total": 10, "topics_covered": dict(permuted)}
+            ]
+        }
+        assert cache.analyze(student_data) == analyze_student_gaps(student_data)
+
+
+def test_numerically_equal_scores_share_an_entry():
+    cache = AnalysisCache()
+    cache.analyze({"diagnostic_scores": {"division": 45}})
+    cache.analyze({"diagnostic_scores": {"division": 45.0}})
+    assert cache.stats()["hits"] == 1
+
+
+def test_key_order_changes_fingerprint():
+    forward = {"diagnostic_scores": {"division": 40, "fractions": 40}}
+    reverse = {"diagnostic_scores": {"fractions": 40, "division": 40}}
+    assert fingerprint_student_data(forward) != fingerprint_student_data(reverse)
@@ -0,0 +1,32 @@
+"""
+Tests for the MCP server's coalesced tool calls: one bad call must not fail its batch.
+"""
+
+from curriculum_validator import validate_question
+from mcp_server import run_tool_calls
+
+QUESTION = {
+    "text": "Emma has 24 stickers. She shares them equally among 4 friends. How many stickers does each friend get?",
+    "answer": 6
+}
+
+
+def test_bad_year_does_not_fail_other_calls_in_batch():
+    calls = [
+        {"question": QUESTION, "topic": "division"},
+        {"question": QUESTION, "topic": "division", "year": [3]},
+        {"question": QUESTION, "topic": "addition", "year": 4},
+        {"question": QUESTION, "topic": "division", "year": 99}
+    ]
+    outcomes = run_tool_calls("validate_question", calls)
+    assert outcomes[0] == (True, validate_question(QUESTION, "division"))
+    assert outcomes[1][0] is False
+    assert outcomes[2] == (True, validate_question(QUESTION, "addition", year=4))
+    assert outcomes[3][0] is False
+
+
+def test_bad_question_does_not_fail_other_calls_in_batch():
+    calls = [{"question": QUESTION, "topic": "division"}, {"topic": "division"}]
+    outcomes = run_tool_calls("validate_question", calls)
+    assert outcomes[0] == (True, validate_question(QUESTION, "division"))
+    assert outcomes[1][0] is False
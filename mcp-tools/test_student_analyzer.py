@@ -0,0 +1,50 @@
+"""
+Tests for the cohort path: analyze_cohort_gaps must match analyze_student_gaps per student.
+"""
+
+import random
+
+from student_analyzer import analyze_cohort_gaps, analyze_student_gaps, build_cohort_arrays
+
+TOPICS = ["multiplication_tables", "division", "fractions", "place_value", "addition", "subtraction"]
+
+
+def _random_student(rng):
+    """A student with shuffled key orders and coarse integer scores, so ties are common."""
+    topics = rng.sample(TOPICS, rng.randint(0, len(TOPICS)))
+    sessions = []
+    for _ in range(rng.randint(0, 8)):
+        covered = rng.sample(TOPICS, rng.randint(0, 3))
+        sessions.append({
+            "questions_correct": rng.randint(0, 10),
+            "questions_total": 10,
+            "topics_covered": {topic: rng.choice([20, 40, 60, 80]) for topic in covered}
+        })
+    return {
+        "diagnostic_scores": {topic: rng.choice([30, 45, 45, 60, 75, 90]) for topic in topics},
+        "recent_sessions": sessions
+    }
+
+
+def test_cohort_matches_per_student_analysis_with_ties():
+    rng = random.Random(7)
+    students = [_random_student(rng) for _ in range(500)]
+    cohort = analyze_cohort_gaps(build_cohort_arrays(students))
+    assert cohort == [analyze_student_gaps(student) for student in students]
+
+
+def test_tied_weak_topics_keep_each_students_key_order():
+    students = [
+        {"diagnostic_scores": {"division": 40, "fractions": 40}},
+        {"diagnostic_scores": {"fractions": 40, "division": 40}}
+    ]
+    cohort = analyze_cohort_gaps(build_cohort_arrays(students))
+    assert [result["weak_topics"] for result in cohort] == [["division", "fractions"], ["fractions", "division"]]
+
+
+def test_without_ranks_ties_fall_back_to_column_order():
+    students = [{"diagnostic_scores": {"division": 40, "fractions": 40}}, {"diagnostic_scores": {"fractions": 40}}]
+    arrays = build_cohort_arrays(students)
+    del arrays["diagnostic_rank"], arrays["session_topic_rank"]
+    cohort = analyze_cohort_gaps(arrays)
+    assert cohort[0]["weak_topics"] == ["division", "fractions"]